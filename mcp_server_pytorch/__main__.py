@@ -5,37 +5,112 @@ Provides semantic search over PyTorch documentation with code-aware results.
 """
 
 import sys
-import argparse
 import os
-import signal
+import copy
 import time
+import signal
+import functools
+import threading
+import dataclasses
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Optional, Tuple
 
 from ptsearch.utils import logger
 from ptsearch.utils.error import ConfigError
-from ptsearch.config import settings
-from ptsearch.core import DatabaseManager, EmbeddingGenerator, SearchEngine
-from ptsearch.protocol import MCPProtocolHandler
-from ptsearch.transport import STDIOTransport, SSETransport
+from ptsearch.config import Settings, settings
 
+# Background listener writing the MCP log file, started once by main()
+_log_listener = None
 
-def search_handler(args: dict) -> dict:
-    """Handle search requests from the MCP protocol."""
-    # Initialize components
-    db_manager = DatabaseManager()
-    embedding_generator = EmbeddingGenerator()
-    search_engine = SearchEngine(db_manager, embedding_generator)
+
+@dataclass(eq=False)
+class ServerState:
+    """Search components shared by every request in the server process."""
+    db: Any
+    embedder: Any
+    engine: Any
+    cache_size: int = settings.query_cache_size
+    cache_ttl: float = settings.query_cache_ttl_seconds
+    
+    def __post_init__(self):
+        """Set up the per-state result cache so repeated queries skip embedding and ANN lookup."""
+        self._results: "OrderedDict[Tuple[str, int, Optional[str]], Tuple[float, dict]]" = OrderedDict()
+        self._results_lock = threading.Lock()
+    
+    def cached_search(self, query: str, num_results: int, filter_type: Optional[str]) -> dict:
+        """Search through a bounded LRU cache of results; size 0 disables it, TTL 0 never expires."""
+        if self.cache_size <= 0:
+            return self.engine.search(query, num_results, filter_type)
+        
+        key = (query, num_results, filter_type)
+        with self._results_lock:
+            entry = self._results.get(key)
+            if entry is not None:
+                if not self.cache_ttl or time.monotonic() - entry[0] < self.cache_ttl:
+                    self._results.move_to_end(key)
+                    return entry[1]
+                del self._results[key]
+        
+        results = self.engine.search(query, num_results, filter_type)
+        # Results ranked against the zero fallback after a failed embedding call are not worth keeping
+        if results.get("metadata", {}).get("embedding_fallback"):
+            return results
+        
+        with self._results_lock:
+            self._results[key] = (time.monotonic(), results)
+            self._results.move_to_end(key)
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return results
+    
+    @classmethod
+    def create(cls, config: Settings = settings, batch_queries: bool = False) -> "ServerState":
+        """Build the database, embedder and search engine from the given settings."""
+        # Deferred so that --help and config errors don't pay for ChromaDB/numpy imports
+        from ptsearch.core import BatchingEmbedder, EmbeddingGenerator, SearchEngine, create_database_manager
+        db = create_database_manager(db_dir=config.db_dir)
+        embedder = EmbeddingGenerator(cache_dir=config.cache_dir)
+        if batch_queries:
+            # Concurrent requests share embedding API calls
+            embedder = BatchingEmbedder(embedder)
+        engine = SearchEngine(db, embedder, query_cache_size=config.query_cache_size,
+                              query_cache_ttl=config.query_cache_ttl_seconds)
+        return cls(db=db, embedder=embedder, engine=engine,
+                   cache_size=config.query_cache_size, cache_ttl=config.query_cache_ttl_seconds)
+    
+    def warm(self) -> None:
+        """Open the vector store up front so the first query doesn't pay for it."""
+        stats = self.db.get_stats()
+        logger.info("Search components ready", total_chunks=stats.get("total_chunks"))
+    
+    def clear_cache(self) -> None:
+        """Drop memoized results, e.g. after the index has been reloaded."""
+        with self._results_lock:
+            self._results.clear()
     
-    # Extract search parameters
-    query = args.get("query", "")
-    n = int(args.get("num_results", settings.max_results))
-    filter_type = args.get("filter", "")
+    def load_from_file(self, filepath: str, **kwargs: Any) -> None:
+        """Reload the vector store from a chunks file and drop results computed against the old index."""
+        try:
+            self.db.load_from_file(filepath, **kwargs)
+        finally:
+            # Even a failed load may have changed the store
+            self.clear_cache()
+
+
+def search_handler(state: ServerState, args: dict) -> dict:
+    """Handle search requests from the MCP protocol."""
+    default_results = settings.max_results
     
-    # Handle empty string filter as None
-    if filter_type == "":
-        filter_type = None
+    # Extract search parameters, collapsing whitespace so trivially different queries share a cache entry
+    query = " ".join(args.get("query", "").split())
+    n = int(args.get("num_results") or default_results)
+    # Missing and empty-string filters both mean no filter
+    filter_type = args.get("filter") or None
     
-    # Execute search
-    return search_engine.search(query, n, filter_type)
+    # Execute search; copy so callers can't mutate the cached result
+    return copy.deepcopy(state.cached_search(query, n, filter_type))
 
 
 def setup_signal_handlers(transport):
@@ -49,24 +124,61 @@ def setup_signal_handlers(transport):
     signal.signal(signal.SIGTERM, signal_handler)
 
 
-def main(argv=None):
-    """Main entry point for MCP server."""
-    # Configure logging
-    log_file = os.environ.get("MCP_LOG_FILE", "mcp_server.log")
+def setup_file_logging(log_file: str) -> None:
+    """Write logs to a file from a background thread so requests never block on disk I/O."""
+    global _log_listener
+    if _log_listener is not None:
+        return
+    
+    import atexit
     import logging
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+    
     file_handler = logging.FileHandler(log_file)
     file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    logging.getLogger().addHandler(file_handler)
     
+    log_queue = queue.SimpleQueue()
+    logging.getLogger().addHandler(QueueHandler(log_queue))
+    _log_listener = QueueListener(log_queue, file_handler)
+    _log_listener.start()
+    # Flush queued records on exit, including sys.exit from signal handlers
+    atexit.register(_log_listener.stop)
+
+
+# Defaults shared by the argument parser and the no-argument fast path
+DEFAULT_ARGS = {
+    "transport": "stdio",
+    "host": "0.0.0.0",
+    "port": 5000,
+    "debug": False,
+    "data_dir": None,
+    "compress": False,
+}
+
+
+def build_parser():
+    """Build the command-line argument parser."""
+    import argparse
     parser = argparse.ArgumentParser(description="PyTorch Documentation Search MCP Server")
-    parser.add_argument("--transport", choices=["stdio", "sse"], default="stdio",
+    parser.add_argument("--transport", choices=["stdio", "sse"], default=DEFAULT_ARGS["transport"],
                       help="Transport mechanism to use (default: stdio)")
-    parser.add_argument("--host", default="0.0.0.0", help="Host to bind to for SSE transport")
-    parser.add_argument("--port", type=int, default=5000, help="Port to bind to for SSE transport")
+    parser.add_argument("--host", default=DEFAULT_ARGS["host"], help="Host to bind to for SSE transport")
+    parser.add_argument("--port", type=int, default=DEFAULT_ARGS["port"], help="Port to bind to for SSE transport")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
     parser.add_argument("--data-dir", help="Path to the data directory containing chunks.json and chunks_with_embeddings.json")
+    parser.add_argument("--compress", action="store_true", help="Gzip SSE transport responses for clients that accept it")
+    return parser
+
+
+def main(argv=None):
+    """Main entry point for MCP server."""
+    # Configure logging
+    setup_file_logging(os.environ.get("MCP_LOG_FILE", "mcp_server.log"))
     
-    args = parser.parse_args(argv)
+    argv = sys.argv[1:] if argv is None else argv
+    # MCP clients spawn the server with no arguments; skip building the parser then
+    args = SimpleNamespace(**DEFAULT_ARGS) if not argv else build_parser().parse_args(argv)
     
     # Log server startup
     logger.info("Starting PyTorch Documentation Search MCP Server",
@@ -74,32 +186,45 @@ def main(argv=None):
                python_version=sys.version,
                current_dir=os.getcwd())
     
-    # Set data directory if provided
+    # Settings are frozen, so a custom data directory yields an updated copy
+    config = settings
     if args.data_dir:
         # Update paths to include the provided data directory
         data_dir = os.path.abspath(args.data_dir)
         logger.info(f"Using custom data directory: {data_dir}")
-        settings.default_chunks_path = os.path.join(data_dir, "chunks.json")
-        settings.default_embeddings_path = os.path.join(data_dir, "chunks_with_embeddings.json")
-        settings.db_dir = os.path.join(data_dir, "chroma_db")
-        settings.cache_dir = os.path.join(data_dir, "embedding_cache")
+        config = dataclasses.replace(
+            settings,
+            default_chunks_path=os.path.join(data_dir, "chunks.json"),
+            default_embeddings_path=os.path.join(data_dir, "chunks_with_embeddings.json"),
+            db_dir=os.path.join(data_dir, "chroma_db"),
+            cache_dir=os.path.join(data_dir, "embedding_cache"),
+        )
     
     # Validate settings
-    errors = settings.validate()
+    errors = config.validate()
     if errors:
         for key, error in errors.items():
             logger.error(f"Configuration error", field=key, error=error)
         raise ConfigError("Invalid configuration", details=errors)
     
-    # Initialize protocol handler
-    protocol_handler = MCPProtocolHandler(search_handler)
-    
     try:
+        # Build search components once and bind them into the protocol handler
+        # stdio handles one request at a time, so only batch queries for SSE
+        state = ServerState.create(config, batch_queries=args.transport == "sse")
+        state.warm()
+        
+        from ptsearch.protocol import MCPProtocolHandler
+        protocol_handler = MCPProtocolHandler(functools.partial(search_handler, state),
+                                              clear_cache=state.clear_cache)
+        
         # Initialize transport
         if args.transport == "stdio":
+            from ptsearch.transport.stdio import STDIOTransport
             transport = STDIOTransport(protocol_handler)
         else:
-            transport = SSETransport(protocol_handler, args.host, args.port)
+            from ptsearch.transport.sse import SSETransport
+            transport = SSETransport(protocol_handler, args.host, args.port,
+                                     compression="gzip" if args.compress else None)
         
         # Setup signal handlers
         setup_signal_handlers(transport)
@@ -7,10 +7,7 @@ import sys
 import os
 import argparse
 
-from ptsearch.search import SearchEngine
-from ptsearch.database import DatabaseManager
-from ptsearch.embedding import EmbeddingGenerator
-from ptsearch.config import MAX_RESULTS
+from ptsearch.config import settings
 
 
 def main():
@@ -36,7 +33,7 @@ def main():
     search_parser = subparsers.add_parser("search", help="Search documentation")
     search_parser.add_argument("query", nargs="?", help="The search query")
     search_parser.add_argument("--interactive", "-i", action="store_true", help="Run in interactive mode")
-    search_parser.add_argument("--results", "-n", type=int, default=MAX_RESULTS, help="Number of results to return")
+    search_parser.add_argument("--results", "-n", type=int, default=settings.max_results, help="Number of results to return")
     search_parser.add_argument("--filter", "-f", choices=["code", "text"], help="Filter results by type")
     
     # Server command
@@ -55,18 +52,20 @@ def main():
         processor.process_directory(args.docs_dir, args.output_file)
     
     elif args.command == "embed":
-        from ptsearch.embedding import EmbeddingGenerator
+        from ptsearch.core import EmbeddingGenerator
         generator = EmbeddingGenerator()
         generator.process_file(args.input_file, args.output_file)
     
     elif args.command == "index":
-        from ptsearch.database import DatabaseManager
-        db_manager = DatabaseManager()
+        from ptsearch.core import create_database_manager
+        db_manager = create_database_manager()
         db_manager.load_from_file(args.input_file)
     
     elif args.command == "search":
+        from ptsearch.core import EmbeddingGenerator, SearchEngine, create_database_manager
+
         # Initialize components
-        db_manager = DatabaseManager()
+        db_manager = create_database_manager()
         embedding_generator = EmbeddingGenerator()
         search_engine = SearchEngine(db_manager, embedding_generator)
         
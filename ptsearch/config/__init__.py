@@ -2,6 +2,6 @@
 Configuration package for PyTorch Documentation Search Tool.
 """
 
-from ptsearch.config.settings import settings
+from ptsearch.config.settings import Settings, settings
 
-__all__ = ["settings"]
\ No newline at end of file
+__all__ = ["Settings", "settings"]
\ No newline at end of file
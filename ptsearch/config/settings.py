@@ -1,20 +1,30 @@
 """
 Settings module for PyTorch Documentation Search Tool.
-Centralizes configuration with environment variable support and validation.
+Centralizes immutable configuration with environment variable support and validation.
 """
 
 import os
-from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+from dataclasses import dataclass, fields
+from typing import Dict, Any
 
-@dataclass
+from dotenv import load_dotenv
+
+@dataclass(frozen=True, slots=True)
 class Settings:
-    """Application settings with defaults and environment variable overrides."""
+    """Immutable application settings with defaults and environment variable overrides."""
     
     # API settings
     openai_api_key: str = ""
     embedding_model: str = "text-embedding-3-large"
     embedding_dimensions: int = 3072
+    # Query embedding batching for concurrent (SSE) requests; max batch 1 disables it
+    embedding_max_batch: int = 16
+    embedding_batch_window_ms: int = 10
+    # Concurrent embedding requests during ingest, capped by the account's requests per minute
+    embedding_concurrency: int = 4
+    embedding_rpm: int = 500
+    # Reject mis-sized embeddings at ingest instead of padding/truncating on every query
+    strict_dimensions: bool = True
     
     # Document processing
     chunk_size: int = 1000
@@ -22,14 +32,26 @@ class Settings:
     
     # Search configuration
     max_results: int = 5
+    # In-process query embedding cache; size 0 disables it, TTL 0 never expires
+    query_cache_size: int = 1024
+    query_cache_ttl_seconds: float = 0.0
     
     # Database configuration
     db_dir: str = "./data/chroma_db"
     collection_name: str = "pytorch_docs"
-    
+    vector_backend: str = "chroma"  # "chroma" or "faiss"
+
+    # FAISS index configuration
+    faiss_nprobe: int = 16
+    faiss_pq_m: int = 96
+    faiss_quant_mode: str = "pq"  # "pq", "int8", "fp16" or "fp32"
+
     # Cache configuration
     cache_dir: str = "./data/embedding_cache"
     max_cache_size_gb: float = 1.0
+    embedding_cache_dtype: str = "float16"  # "float32", "float16" or "int8"
+    parse_cache_dir: str = "./data/parse_cache"
+    parse_cache_ttl_hours: float = 0.0  # 0 keeps entries until content changes
     
     # File paths
     default_chunks_path: str = "./data/chunks.json"
@@ -40,28 +62,31 @@ class Settings:
     tool_description: str = ("Search PyTorch documentation or examples. Call when the user asks "
                              "about a PyTorch API, error message, best-practice or needs a code snippet.")
     
-    def __post_init__(self):
-        """Load settings from environment variables."""
-        # Load all settings from environment variables
-        for field_name in self.__dataclass_fields__:
-            env_name = f"PTSEARCH_{field_name.upper()}"
-            env_value = os.environ.get(env_name)
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Build settings from defaults, `.env` and PTSEARCH_* environment variables."""
+        load_dotenv()
+        
+        overrides: Dict[str, Any] = {}
+        for settings_field in fields(cls):
+            env_value = os.environ.get(f"PTSEARCH_{settings_field.name.upper()}")
             
             if env_value is not None:
-                field_type = self.__dataclass_fields__[field_name].type
                 # Convert the string to the appropriate type
-                if field_type == int:
-                    setattr(self, field_name, int(env_value))
-                elif field_type == float:
-                    setattr(self, field_name, float(env_value))
-                elif field_type == bool:
-                    setattr(self, field_name, env_value.lower() in ('true', 'yes', '1'))
+                if settings_field.type == int:
+                    overrides[settings_field.name] = int(env_value)
+                elif settings_field.type == float:
+                    overrides[settings_field.name] = float(env_value)
+                elif settings_field.type == bool:
+                    overrides[settings_field.name] = env_value.lower() in ('true', 'yes', '1')
                 else:
-                    setattr(self, field_name, env_value)
+                    overrides[settings_field.name] = env_value
         
         # Special case for OPENAI_API_KEY which has a different env var name
-        if not self.openai_api_key:
-            self.openai_api_key = os.environ.get("OPENAI_API_KEY", "")
+        if not overrides.get("openai_api_key"):
+            overrides["openai_api_key"] = os.environ.get("OPENAI_API_KEY", "")
+        
+        return cls(**overrides)
     
     def validate(self) -> Dict[str, str]:
         """Validate settings and return any errors."""
@@ -78,8 +103,30 @@ class Settings:
             errors["overlap_size"] = "Overlap size cannot be negative"
         if self.max_results <= 0:
             errors["max_results"] = "Max results must be positive"
-        
+        if self.query_cache_size < 0:
+            errors["query_cache_size"] = "Query cache size cannot be negative"
+        if self.query_cache_ttl_seconds < 0:
+            errors["query_cache_ttl_seconds"] = "Query cache TTL cannot be negative"
+        if self.embedding_max_batch <= 0:
+            errors["embedding_max_batch"] = "Embedding max batch must be positive"
+        if self.embedding_batch_window_ms < 0:
+            errors["embedding_batch_window_ms"] = "Embedding batch window cannot be negative"
+        if self.embedding_concurrency <= 0:
+            errors["embedding_concurrency"] = "Embedding concurrency must be positive"
+        if self.embedding_rpm <= 0:
+            errors["embedding_rpm"] = "Embedding requests per minute must be positive"
+        if self.embedding_cache_dtype not in ("float32", "float16", "int8"):
+            errors["embedding_cache_dtype"] = "Embedding cache dtype must be 'float32', 'float16' or 'int8'"
+
+        # Validate vector backend settings
+        if self.vector_backend not in ("chroma", "faiss"):
+            errors["vector_backend"] = "Vector backend must be 'chroma' or 'faiss'"
+        if self.faiss_nprobe <= 0:
+            errors["faiss_nprobe"] = "FAISS nprobe must be positive"
+        if self.faiss_quant_mode not in ("pq", "int8", "fp16", "fp32"):
+            errors["faiss_quant_mode"] = "FAISS quant mode must be 'pq', 'int8', 'fp16' or 'fp32'"
+
         return errors
 
-# Singleton instance of settings
-settings = Settings()
\ No newline at end of file
+# Singleton instance of settings, read once at import
+settings = Settings.from_env()
\ No newline at end of file
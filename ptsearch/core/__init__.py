@@ -5,9 +5,18 @@ Core functionality for PyTorch Documentation Search Tool.
 # Import compatibility patches first
 from ptsearch.utils.compat import *
 
-from ptsearch.core.database import DatabaseManager
-from ptsearch.core.embedding import EmbeddingGenerator
+from ptsearch.core.database import DatabaseManager, create_database_manager
+from ptsearch.core.faiss_backend import FaissBackend
+from ptsearch.core.embedding import EmbeddingGenerator, BatchingEmbedder
 from ptsearch.core.search import SearchEngine
 from ptsearch.core.formatter import ResultFormatter
 
-__all__ = ["DatabaseManager", "EmbeddingGenerator", "SearchEngine", "ResultFormatter"]
\ No newline at end of file
+__all__ = [
+    "DatabaseManager",
+    "FaissBackend",
+    "create_database_manager",
+    "EmbeddingGenerator",
+    "BatchingEmbedder",
+    "SearchEngine",
+    "ResultFormatter",
+]
\ No newline at end of file
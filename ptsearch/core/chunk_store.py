@@ -0,0 +1,152 @@
+"""
+Chunk storage module for PyTorch Documentation Search Tool.
+Stores embedded chunks as a float32 .npy matrix plus a JSON Lines metadata file.
+"""
+
+import os
+import json
+import shutil
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
+from ptsearch.utils import logger
+from ptsearch.utils.error import DatabaseError
+# Dependency-free JSON chunk I/O, re-exported for core callers
+from ptsearch.utils.chunk_io import ChunkWriter, iter_chunks, read_json
+
+EMBEDDINGS_SUFFIX = ".npy"
+META_SUFFIX = ".meta.jsonl"
+# Block size for copying streamed embedding rows into the final .npy file
+RAW_COPY_BYTES = 16 * 1024 * 1024
+
+
+def chunk_metadata(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the metadata to store for a chunk, folding in its top-level chunk number.
+
+    Split chunks share their section's metadata dict, so the merge happens here, once
+    per stored row, rather than by copying the dict for every chunk at parse time.
+    """
+    metadata = chunk.get("metadata") or {}
+    if "chunk" not in chunk:
+        return metadata
+    return {**metadata, "chunk": chunk["chunk"]}
+
+
+def sidecar_paths(filepath: str) -> Tuple[str, str]:
+    """Return the embeddings and metadata paths stored alongside a chunks file."""
+    base, ext = os.path.splitext(filepath)
+    if ext not in (".json", EMBEDDINGS_SUFFIX):
+        base = filepath
+    return base + EMBEDDINGS_SUFFIX, base + META_SUFFIX
+
+
+def has_sidecar(filepath: str) -> bool:
+    """Check whether an up-to-date binary sidecar exists for a chunks file."""
+    embeddings_path, meta_path = sidecar_paths(filepath)
+    if not (os.path.exists(embeddings_path) and os.path.exists(meta_path)):
+        return False
+
+    # A JSON file rewritten after the sidecar means the sidecar is stale
+    if filepath.endswith(".json") and os.path.exists(filepath):
+        return os.path.getmtime(embeddings_path) >= os.path.getmtime(filepath)
+    return True
+
+
+class SidecarWriter:
+    """Streams chunks into the .npy/.meta.jsonl sidecar without holding them all in memory.
+
+    Rows go to a raw temporary file because the .npy header needs the final row count;
+    ``close`` writes the header and copies the rows after it.
+    """
+
+    def __init__(self, filepath: str, dimensions: int):
+        """Open the sidecar files for a chunks file."""
+        self.embeddings_path, self.meta_path = sidecar_paths(filepath)
+        self.dimensions = dimensions
+        self.count = 0
+        self._raw = open(self.embeddings_path + ".tmp", 'w+b')
+        self._meta = open(self.meta_path, 'w', encoding='utf-8')
+
+    def write(self, chunks: List[Dict[str, Any]]) -> None:
+        """Append a batch of chunks to the sidecar."""
+        matrix = np.zeros((len(chunks), self.dimensions), dtype=np.float32)
+        for row, chunk in enumerate(chunks):
+            embedding = chunk.get("embedding")
+            if embedding is not None and len(embedding) > 0:
+                vector = np.asarray(embedding, dtype=np.float32).ravel()[:self.dimensions]
+                matrix[row, :vector.shape[0]] = vector
+
+            record = {key: value for key, value in chunk.items() if key != "embedding"}
+            record.setdefault("id", self.count + row)
+            self._meta.write(json.dumps(record) + "\n")
+
+        self._raw.write(matrix.tobytes())
+        self.count += len(chunks)
+
+    def close(self) -> None:
+        """Write the final .npy file and close everything."""
+        self._meta.close()
+
+        header = {
+            "descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+            "fortran_order": False,
+            "shape": (self.count, self.dimensions),
+        }
+        self._raw.seek(0)
+        partial_path = self.embeddings_path + ".partial"
+        with open(partial_path, 'wb') as f:
+            np.lib.format.write_array_header_1_0(f, header)
+            shutil.copyfileobj(self._raw, f, length=RAW_COPY_BYTES)
+        # Rename last so a crash never leaves a truncated matrix that looks current
+        os.replace(partial_path, self.embeddings_path)
+        self._raw.close()
+        os.remove(self._raw.name)
+
+        logger.info("Saved chunk sidecar", count=self.count, embeddings=self.embeddings_path, meta=self.meta_path)
+
+    def abort(self) -> None:
+        """Discard a partially written sidecar."""
+        self._meta.close()
+        self._raw.close()
+        for path in (self._raw.name, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __enter__(self) -> "SidecarWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def save_chunks(chunks: List[Dict[str, Any]], filepath: str, dimensions: int) -> None:
+    """Write chunk embeddings to a .npy matrix and the rest to JSON Lines."""
+    with SidecarWriter(filepath, dimensions) as writer:
+        writer.write(chunks)
+
+
+def load_chunks(filepath: str) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Load chunk metadata and a read-only memory map of their embeddings."""
+    embeddings_path, meta_path = sidecar_paths(filepath)
+    loads = orjson.loads if orjson is not None else json.loads
+
+    embeddings = np.load(embeddings_path, mmap_mode="r")
+    with open(meta_path, 'rb') as f:
+        records = [loads(line) for line in f if line.strip()]
+
+    if embeddings.ndim != 2 or embeddings.shape[0] != len(records):
+        error_msg = "Chunk sidecar embeddings don't match metadata"
+        logger.error(error_msg, embeddings=list(embeddings.shape), records=len(records))
+        raise DatabaseError(error_msg, details={"filepath": filepath})
+
+    logger.info("Loaded chunk sidecar", count=len(records), path=embeddings_path)
+    return records, embeddings
@@ -4,14 +4,44 @@ Handles storage and retrieval of chunks in ChromaDB.
 """
 
 import os
-import json
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Optional
 
 import chromadb
+import numpy as np
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; without it JSON files are parsed whole
+    ijson = None
 
 from ptsearch.utils import logger
 from ptsearch.utils.error import DatabaseError
 from ptsearch.config import settings
+from ptsearch.core.chunk_store import chunk_metadata, has_sidecar, iter_chunks, load_chunks, read_json
+
+# Vectors are unit-normalized on both sides, so inner product equals cosine similarity
+COLLECTION_METADATA = {"hnsw:space": "ip"}
+
+# Shared all-zeros fallback for missing or malformed embeddings
+_ZERO_VEC = np.zeros(settings.embedding_dimensions, dtype=np.float32)
+
+# Resize warnings already logged, so mis-sized inputs don't spam the hot path
+_resize_warnings = set()
+
+
+def _warn_resize_once(message: str, from_dim: int, to_dim: int) -> None:
+    """Log a padding/truncation warning the first time it occurs in this process."""
+    if message not in _resize_warnings:
+        _resize_warnings.add(message)
+        logger.warning(message, from_dim=from_dim, to_dim=to_dim, note="further occurrences not logged")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return vectors scaled to unit L2 norm along the last axis (zero vectors stay zero)."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / (norms + 1e-12)
+
 
 class DatabaseManager:
     """Manages storage and retrieval of document chunks in ChromaDB."""
@@ -20,7 +50,7 @@ class DatabaseManager:
         """Initialize database manager for ChromaDB."""
         self.db_dir = db_dir
         self.collection_name = collection_name
-        self.collection = None
+        self._collection = None
         
         # Create directory if it doesn't exist
         os.makedirs(db_dir, exist_ok=True)
@@ -36,6 +66,8 @@ class DatabaseManager:
     
     def reset_collection(self) -> None:
         """Delete and recreate the collection with standard settings."""
+        # Drop the cached handle first so a failed recreate can't leave a stale one
+        self._collection = None
         try:
             self.client.delete_collection(self.collection_name)
             logger.info(f"Deleted existing collection", collection=self.collection_name)
@@ -44,74 +76,104 @@ class DatabaseManager:
             logger.info(f"No existing collection to delete", error=str(e))
         
         # Create a new collection with standard settings
-        self.collection = self.client.create_collection(
+        self._collection = self.client.create_collection(
             name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}
+            metadata=COLLECTION_METADATA
         )
         logger.info(f"Created new collection", collection=self.collection_name)
     
     def get_collection(self):
-        """Get or create the collection."""
-        if self.collection is not None:
-            return self.collection
-            
+        """Get the cached collection handle, opening it on first use."""
+        if self._collection is not None:
+            return self._collection
+        return self._open_collection()
+    
+    def _open_collection(self):
+        """Get or create the collection and cache the handle."""
         try:
-            self.collection = self.client.get_collection(name=self.collection_name)
-            logger.info(f"Retrieved existing collection", collection=self.collection_name)
-        except Exception as e:
-            # Collection doesn't exist, create it
-            logger.info(f"Creating new collection", error=str(e))
-            self.collection = self.client.create_collection(
+            self._collection = self.client.get_or_create_collection(
                 name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
+                metadata=COLLECTION_METADATA
             )
-            logger.info(f"Created new collection", collection=self.collection_name)
+            logger.info(f"Opened collection", collection=self.collection_name)
+        except Exception as e:
+            error_msg = f"Error opening collection: {e}"
+            logger.error(error_msg)
+            raise DatabaseError(error_msg, details={"collection": self.collection_name})
         
-        return self.collection
+        return self._collection
     
-    def add_chunks(self, chunks: List[Dict[str, Any]], batch_size: int = 50) -> None:
-        """Add chunks to the collection with batching."""
+    def add_chunks(self, chunks: List[Dict[str, Any]], batch_size: int = 50,
+                   max_workers: int = 4, embeddings: Optional[np.ndarray] = None) -> None:
+        """Add chunks to the collection with batching.
+
+        ``embeddings`` may supply an (N, D) matrix, e.g. a memory-mapped sidecar,
+        in place of the per-chunk ``embedding`` lists.
+        """
         collection = self.get_collection()
+        if not chunks:
+            return
         
-        # Prepare data for ChromaDB
-        ids = [str(chunk.get("id", idx)) for idx, chunk in enumerate(chunks)]
-        embeddings = [self._ensure_vector_format(chunk.get("embedding")) for chunk in chunks]
-        documents = [chunk.get("text", "") for chunk in chunks]
-        metadatas = [chunk.get("metadata", {}) for chunk in chunks]
+        # Convert all embeddings up front; batches slice the shared matrix
+        if embeddings is None:
+            embeddings = self._embedding_matrix(chunks)
         
-        # Add data in batches
+        # Add data in batches, never exceeding what the client accepts per call
+        batch_size = max(1, min(batch_size, self.client.get_max_batch_size()))
         total_batches = (len(chunks) - 1) // batch_size + 1
         logger.info(f"Adding chunks in batches", count=len(chunks), batches=total_batches)
         
-        for i in range(0, len(chunks), batch_size):
+        def add_batch(i: int) -> None:
             end_idx = min(i + batch_size, len(chunks))
-            batch_num = i // batch_size + 1
-            
-            try:
-                collection.add(
-                    ids=ids[i:end_idx],
-                    embeddings=embeddings[i:end_idx],
-                    documents=documents[i:end_idx],
-                    metadatas=metadatas[i:end_idx]
-                )
-                logger.info(f"Added batch", batch=batch_num, total=total_batches, chunks=end_idx-i)
-                
-            except Exception as e:
-                error_msg = f"Error adding batch {batch_num}: {e}"
-                logger.error(error_msg)
-                raise DatabaseError(error_msg, details={
-                    "batch": batch_num,
-                    "total_batches": total_batches,
-                    "batch_size": end_idx - i
-                })
+            self._add_batch(collection, chunks, embeddings, start=i, end=end_idx)
+            logger.debug("Added batch", batch=i // batch_size + 1, total=total_batches, chunks=end_idx-i)
+        
+        # Overlap ChromaDB's index inserts across batches
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total_batches))) as executor:
+            futures = [(i, executor.submit(add_batch, i)) for i in range(0, len(chunks), batch_size)]
+            for i, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    batch_num = i // batch_size + 1
+                    error_msg = f"Error adding batch {batch_num}: {e}"
+                    logger.error(error_msg)
+                    for _, pending in futures:
+                        pending.cancel()
+                    raise DatabaseError(error_msg, details={
+                        "batch": batch_num,
+                        "total_batches": total_batches,
+                        "batch_size": min(batch_size, len(chunks) - i)
+                    })
+        
+        logger.info("Added chunks", count=len(chunks), batches=total_batches)
+    
+    def _add_batch(self, collection, chunks: List[Dict[str, Any]], embeddings: np.ndarray,
+                   start: int = 0, end: Optional[int] = None, id_base: int = 0) -> None:
+        """Insert rows ``start:end`` of chunks and their embeddings.
+
+        Rows are read by index rather than through a sliced copy of ``chunks``, and the
+        embedding rows are a view; only the lists ChromaDB requires are built.
+        """
+        rows = range(start, len(chunks) if end is None else end)
+        collection.add(
+            ids=[str(chunks[row].get("id", id_base + row)) for row in rows],
+            embeddings=normalize_rows(embeddings[rows.start:rows.stop]),
+            documents=[chunks[row].get("text", "") for row in rows],
+            metadatas=[chunk_metadata(chunks[row]) for row in rows]
+        )
     
     def query(self, query_embedding: List[float], n_results: int = 5, 
               filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Query the collection with vector search."""
         collection = self.get_collection()
         
-        # Ensure query embedding has the correct format
-        query_embedding = self._ensure_vector_format(query_embedding)
+        # Embeddings are validated at ingest, so trust the embedder unless lenient handling is on
+        if settings.strict_dimensions:
+            query_embedding = np.ascontiguousarray(query_embedding, dtype=np.float32)
+        else:
+            query_embedding = self._ensure_vector_format(query_embedding, as_array=True)
+        query_embedding = normalize_rows(query_embedding)
         
         # Prepare query parameters
         query_params = {
@@ -150,10 +212,30 @@ class DatabaseManager:
         """Load chunks from a file into ChromaDB."""
         logger.info(f"Loading chunks from file", path=filepath)
         
-        # Load the chunks
+        # Load the chunks, preferring the memory-mapped sidecar over JSON
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                chunks = json.load(f)
+            if not has_sidecar(filepath) and (ijson is not None or filepath.endswith(".jsonl")):
+                # Stream the chunks so the whole file is never held in memory.
+                # Strict mode checks every embedding in a first pass, before the store is touched
+                if settings.strict_dimensions:
+                    self._validate_dimensions(iter_chunks(filepath))
+                if reset:
+                    self.reset_collection()
+                count = self._stream_from_file(filepath, batch_size)
+                logger.info(f"Successfully loaded chunks into ChromaDB", count=count)
+                return
+            
+            embeddings = None
+            if has_sidecar(filepath):
+                chunks, embeddings = load_chunks(filepath)
+                if embeddings.shape[1] != settings.embedding_dimensions:
+                    raise DatabaseError(f"Sidecar embeddings have {embeddings.shape[1]} dimensions, "
+                                        f"expected {settings.embedding_dimensions}")
+            else:
+                chunks = read_json(filepath)
+                
+                if settings.strict_dimensions:
+                    self._validate_dimensions(chunks)
             
             logger.info(f"Loaded chunks from file", count=len(chunks))
             
@@ -162,7 +244,7 @@ class DatabaseManager:
                 self.reset_collection()
             
             # Add chunks to collection
-            self.add_chunks(chunks, batch_size)
+            self.add_chunks(chunks, batch_size, embeddings=embeddings)
             
             logger.info(f"Successfully loaded chunks into ChromaDB", count=len(chunks))
         except Exception as e:
@@ -170,6 +252,29 @@ class DatabaseManager:
             logger.error(error_msg)
             raise DatabaseError(error_msg, details={"filepath": filepath})
     
+    def _stream_from_file(self, filepath: str, batch_size: int) -> int:
+        """Parse chunks incrementally, inserting each batch as it fills."""
+        collection = self.get_collection()
+        batch_size = max(1, min(batch_size, self.client.get_max_batch_size()))
+        buffer: List[Dict[str, Any]] = []
+        count = 0
+        
+        def flush() -> None:
+            self._add_batch(collection, buffer, self._embedding_matrix(buffer), id_base=count)
+            logger.debug("Added batch", chunks=len(buffer), total_chunks=count + len(buffer))
+        
+        for chunk in iter_chunks(filepath):
+            buffer.append(chunk)
+            if len(buffer) >= batch_size:
+                flush()
+                count += len(buffer)
+                buffer = []
+        if buffer:
+            flush()
+            count += len(buffer)
+        
+        return count
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get basic statistics about the collection."""
         collection = self.get_collection()
@@ -188,35 +293,63 @@ class DatabaseManager:
             logger.error(error_msg)
             raise DatabaseError(error_msg)
     
-    def _ensure_vector_format(self, embedding: Any) -> List[float]:
-        """Ensure vector is in the correct format for ChromaDB."""
+    def _ensure_vector_format(self, embedding: Any, as_array: bool = False) -> List[float]:
+        """Ensure vector is in the correct format for ChromaDB.
+
+        Conversion, padding and truncation happen in NumPy; the result is only turned
+        into a list of Python floats at the ChromaDB boundary unless ``as_array`` is set.
+        """
         # Handle empty or None embeddings
-        if not embedding:
-            return [0.0] * settings.embedding_dimensions
-        
-        # Handle NumPy arrays
-        if hasattr(embedding, "tolist"):
-            embedding = embedding.tolist()
+        if embedding is None or len(embedding) == 0:
+            return _ZERO_VEC.copy() if as_array else _ZERO_VEC.tolist()
         
-        # Ensure all values are Python floats
+        # Single cast to float32 (raw float32 bytes are viewed without copying)
         try:
-            embedding = [float(x) for x in embedding]
-        except Exception as e:
+            if isinstance(embedding, (bytes, bytearray)):
+                vector = np.frombuffer(embedding, dtype=np.float32)
+            else:
+                vector = np.asarray(embedding, dtype=np.float32).ravel()
+        except (TypeError, ValueError) as e:
             logger.error(f"Error converting embedding values to float", error=str(e))
-            return [0.0] * settings.embedding_dimensions
+            return _ZERO_VEC.copy() if as_array else _ZERO_VEC.tolist()
         
         # Verify dimensions
-        if len(embedding) != settings.embedding_dimensions:
+        dimensions = settings.embedding_dimensions
+        if vector.size != dimensions:
             # Pad or truncate if necessary
-            if len(embedding) < settings.embedding_dimensions:
-                logger.warning(f"Padding embedding dimensions", 
-                              from_dim=len(embedding), 
-                              to_dim=settings.embedding_dimensions)
-                embedding.extend([0.0] * (settings.embedding_dimensions - len(embedding)))
+            if vector.size < dimensions:
+                _warn_resize_once("Padding embedding dimensions", vector.size, dimensions)
+                vector = np.pad(vector, (0, dimensions - vector.size))
             else:
-                logger.warning(f"Truncating embedding dimensions", 
-                              from_dim=len(embedding), 
-                              to_dim=settings.embedding_dimensions)
-                embedding = embedding[:settings.embedding_dimensions]
+                _warn_resize_once("Truncating embedding dimensions", vector.size, dimensions)
+                vector = vector[:dimensions]
         
-        return embedding
\ No newline at end of file
+        return vector if as_array else vector.tolist()
+    
+    def _validate_dimensions(self, chunks: Iterable[Dict[str, Any]]) -> None:
+        """Raise if any chunk embedding doesn't match the configured dimensions."""
+        dimensions = settings.embedding_dimensions
+        invalid = [
+            str(chunk.get("id", idx))
+            for idx, chunk in enumerate(chunks)
+            if chunk.get("embedding") is None or len(chunk["embedding"]) != dimensions
+        ]
+        if invalid:
+            error_msg = f"{len(invalid)} chunks have embeddings without {dimensions} dimensions"
+            logger.error(error_msg, examples=invalid[:5])
+            raise DatabaseError(error_msg, details={"chunk_ids": invalid[:20]})
+    
+    def _embedding_matrix(self, chunks: List[Dict[str, Any]]) -> np.ndarray:
+        """Convert all chunk embeddings into one contiguous float32 matrix."""
+        matrix = np.empty((len(chunks), settings.embedding_dimensions), dtype=np.float32)
+        for row, chunk in enumerate(chunks):
+            matrix[row] = self._ensure_vector_format(chunk.get("embedding"), as_array=True)
+        return matrix
+
+
+def create_database_manager(**kwargs):
+    """Create the vector store selected by ``settings.vector_backend``."""
+    if settings.vector_backend == "faiss":
+        from ptsearch.core.faiss_backend import FaissBackend
+        return FaissBackend(**kwargs)
+    return DatabaseManager(**kwargs)
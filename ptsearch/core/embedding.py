@@ -1,19 +1,54 @@
 """
 Embedding generation module for PyTorch Documentation Search Tool.
-Handles generating embeddings with OpenAI API and basic caching.
+Handles generating embeddings with OpenAI API and a SQLite embedding cache.
 """
 
 import os
-import json
+import base64
+import asyncio
 import hashlib
+import sqlite3
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
 
-from openai import OpenAI
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
 
 from ptsearch.utils import logger
 from ptsearch.utils.error import APIError, ConfigError
 from ptsearch.config import settings
+from ptsearch.core.chunk_store import ChunkWriter, SidecarWriter, iter_chunks
+# Re-exported here; it lives in utils so the flat modules can use it without the core stack
+from ptsearch.utils.batching import BatchingEmbedder
+
+CACHE_DB_FILENAME = "embeddings.db"
+
+# Shared, immutable fallback for empty texts and failed requests
+_ZERO_EMBEDDING = (0.0,) * settings.embedding_dimensions
+
+def encode_embedding(embedding: List[float], dtype: str) -> Tuple[bytes, float]:
+    """Pack an embedding into bytes of the given dtype, with a scale for int8."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    if dtype == "int8":
+        # Symmetric scalar quantization; cosine ranking is barely affected
+        peak = float(np.abs(vector).max()) if vector.size else 0.0
+        scale = peak / 127 if peak > 0 else 1.0
+        return np.round(vector / scale).astype(np.int8).tobytes(), scale
+    return vector.astype(dtype).tobytes(), 1.0
+
+def decode_embedding(blob: bytes, dtype: str, scale: float) -> np.ndarray:
+    """Unpack bytes stored by ``encode_embedding`` into a float32 vector."""
+    vector = np.frombuffer(blob, dtype=dtype).astype(np.float32)
+    if dtype == "int8":
+        vector *= scale
+    return vector
+
+def decode_response_embedding(embedding: Any) -> np.ndarray:
+    """Convert an API embedding, base64 little-endian float32 or a float list, to an array."""
+    if isinstance(embedding, str):
+        return np.frombuffer(base64.b64decode(embedding), dtype="<f4")
+    return np.asarray(embedding, dtype=np.float32)
 
 class EmbeddingGenerator:
     """Generates embeddings using OpenAI API with caching support."""
@@ -39,7 +74,8 @@ class EmbeddingGenerator:
         # Initialize cache if enabled
         if use_cache:
             os.makedirs(self.cache_dir, exist_ok=True)
-            logger.info(f"Embedding cache initialized", path=self.cache_dir)
+            self._open_cache()
+            logger.info("Embedding cache initialized", path=self.cache_dir)
     
     def _initialize_client(self):
         """Initialize OpenAI client with error handling for compatibility."""
@@ -59,28 +95,29 @@ class EmbeddingGenerator:
                 logger.error(error_msg)
                 raise APIError(error_msg)
     
-    def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for a single text with caching."""
+    def generate_embedding(self, text: str) -> Sequence[float]:
+        """Generate embedding for a single text with caching, as a float32 array."""
         if not text:
             logger.warning("Empty text provided for embedding generation")
-            return [0.0] * settings.embedding_dimensions
+            return _ZERO_EMBEDDING
             
         if self.use_cache:
             # Check cache first
-            cached_embedding = self._get_from_cache(text)
-            if cached_embedding:
+            cached_embedding = self._get_many_from_cache([text], as_array=True)[0]
+            if cached_embedding is not None:
                 self.stats["hits"] += 1
                 return cached_embedding
         
         self.stats["misses"] += 1
         
-        # Generate embedding via API
+        # Generate embedding via API; base64 decodes straight into a float32 array
         try:
             response = self.client.embeddings.create(
                 input=text,
-                model=self.model
+                model=self.model,
+                encoding_format="base64"
             )
-            embedding = response.data[0].embedding
+            embedding = decode_response_embedding(response.data[0].embedding)
             
             # Cache the result
             if self.use_cache:
@@ -91,98 +128,128 @@ class EmbeddingGenerator:
             error_msg = f"Error generating embedding: {e}"
             logger.error(error_msg)
             # Return zeros as fallback rather than failing completely
-            return [0.0] * settings.embedding_dimensions
+            return _ZERO_EMBEDDING
     
-    def generate_embeddings(self, texts: List[str], batch_size: int = 20) -> List[List[float]]:
+    def generate_embeddings(self, texts: List[str], batch_size: int = 20) -> List[Sequence[float]]:
         """Generate embeddings for multiple texts with batching."""
         if not texts:
             logger.warning("Empty text list provided for batch embedding generation")
             return []
+        
+        # Embed each distinct text once; repeated boilerplate is common in docs
+        positions: Dict[str, int] = {}
+        slots = [positions.setdefault(text, len(positions)) for text in texts]
+        if len(positions) < len(texts):
+            unique_embeddings = self.generate_embeddings(list(positions), batch_size)
+            return [unique_embeddings[slot] for slot in slots]
             
-        all_embeddings = []
+        all_embeddings: List[Optional[Sequence[float]]] = [None] * len(texts)
+        pending = []  # (batch number, positions in texts, uncached texts)
         
-        # Process in batches
+        # Resolve cache hits first, with one lookup per batch
         for i in range(0, len(texts), batch_size):
             batch_texts = texts[i:i+batch_size]
-            batch_embeddings = []
-            
-            # Check cache first
-            uncached_texts = []
-            uncached_indices = []
             
             if self.use_cache:
-                for j, text in enumerate(batch_texts):
-                    cached_embedding = self._get_from_cache(text)
+                uncached_texts = []
+                uncached_indices = []
+                for j, (text, cached_embedding) in enumerate(zip(batch_texts, self._get_many_from_cache(batch_texts))):
                     if cached_embedding:
                         self.stats["hits"] += 1
-                        batch_embeddings.append(cached_embedding)
+                        all_embeddings[i + j] = cached_embedding
                     else:
                         self.stats["misses"] += 1
                         uncached_texts.append(text)
-                        uncached_indices.append(j)
+                        uncached_indices.append(i + j)
             else:
                 uncached_texts = batch_texts
-                uncached_indices = list(range(len(batch_texts)))
+                uncached_indices = list(range(i, i + len(batch_texts)))
                 self.stats["misses"] += len(batch_texts)
             
-            # Process uncached texts
             if uncached_texts:
-                try:
-                    response = self.client.embeddings.create(
-                        input=uncached_texts,
-                        model=self.model
-                    )
-                    
-                    api_embeddings = [item.embedding for item in response.data]
-                    
-                    # Cache results
-                    if self.use_cache:
-                        for text, embedding in zip(uncached_texts, api_embeddings):
-                            self._save_to_cache(text, embedding)
-                    
-                    # Place embeddings in correct order
-                    for idx, embedding in zip(uncached_indices, api_embeddings):
-                        while len(batch_embeddings) <= idx:
-                            batch_embeddings.append(None)
-                        batch_embeddings[idx] = embedding
-                    
-                except Exception as e:
-                    error_msg = f"Error generating batch embeddings: {e}"
-                    logger.error(error_msg, batch=i//batch_size)
-                    # Use zeros as fallback
-                    for idx in uncached_indices:
-                        while len(batch_embeddings) <= idx:
-                            batch_embeddings.append(None)
-                        batch_embeddings[idx] = [0.0] * settings.embedding_dimensions
-            
-            # Ensure all positions have embeddings
-            for j in range(len(batch_texts)):
-                if j >= len(batch_embeddings) or batch_embeddings[j] is None:
-                    batch_embeddings.append([0.0] * settings.embedding_dimensions)
+                pending.append((i // batch_size, uncached_indices, uncached_texts))
+        
+        # Embed uncached batches, concurrently when there is more than one
+        if len(pending) == 1:
+            results = [self._embed_batch(pending[0][2])]
+        elif pending:
+            results = asyncio.run(self._embed_batches_async([batch for _, _, batch in pending]))
+        else:
+            results = []
+        
+        for (batch_number, indices, batch_texts), result in zip(pending, results):
+            if not isinstance(result, Exception) and len(result) != len(batch_texts):
+                result = APIError(f"expected {len(batch_texts)} embeddings, got {len(result)}")
+            if isinstance(result, Exception):
+                error_msg = f"Error generating batch embeddings: {result}"
+                logger.error(error_msg, batch=batch_number)
+                # Use zeros as fallback
+                for idx in indices:
+                    all_embeddings[idx] = _ZERO_EMBEDDING
+                continue
             
-            all_embeddings.extend(batch_embeddings[:len(batch_texts)])
+            # Cache results
+            if self.use_cache:
+                self._save_many_to_cache(batch_texts, result)
             
-            # Respect API rate limits
-            if i + batch_size < len(texts):
-                time.sleep(0.5)
+            # Place embeddings in correct order
+            for idx, embedding in zip(indices, result):
+                all_embeddings[idx] = embedding
         
         # Log cache stats once at the end
         total_processed = self.stats["hits"] + self.stats["misses"]
         if self.use_cache and total_processed > 0:
             hit_rate = self.stats["hits"] / total_processed
-            logger.info(f"Embedding cache statistics", 
+            logger.info("Embedding cache statistics", 
                         hits=self.stats["hits"], 
                         misses=self.stats["misses"], 
                         hit_rate=f"{hit_rate:.2%}")
         
         return all_embeddings
     
+    def _embed_batch(self, texts: List[str]) -> Any:
+        """Embed one batch synchronously, returning the exception instead of raising."""
+        try:
+            response = self.client.embeddings.create(input=texts, model=self.model)
+            return [item.embedding for item in response.data]
+        except Exception as e:
+            return e
+    
+    async def _embed_batches_async(self, batches: List[List[str]]) -> List[Any]:
+        """Embed batches with bounded concurrency and request rate."""
+        semaphore = asyncio.Semaphore(settings.embedding_concurrency)
+        limiter = RateLimiter(settings.embedding_rpm)
+        
+        async with self._create_async_client() as aclient:
+            async def run(texts: List[str]) -> List[List[float]]:
+                async with semaphore:
+                    await limiter.acquire()
+                    return await self._embed_batch_async(aclient, texts)
+            
+            return await asyncio.gather(*(run(texts) for texts in batches), return_exceptions=True)
+    
+    async def _embed_batch_async(self, aclient: AsyncOpenAI, texts: List[str]) -> List[List[float]]:
+        """Embed one batch of texts with the async client."""
+        response = await aclient.embeddings.create(input=texts, model=self.model)
+        return [item.embedding for item in response.data]
+    
+    def _create_async_client(self) -> AsyncOpenAI:
+        """Create an async OpenAI client; it is bound to the running event loop."""
+        try:
+            return AsyncOpenAI(api_key=self.api_key)
+        except TypeError as e:
+            # Same proxies incompatibility handled in _initialize_client
+            if "unexpected keyword argument 'proxies'" in str(e):
+                import httpx
+                return AsyncOpenAI(api_key=self.api_key, http_client=httpx.AsyncClient(timeout=60.0))
+            raise
+    
     def embed_chunks(self, chunks: List[Dict[str, Any]], batch_size: int = 20) -> List[Dict[str, Any]]:
         """Generate embeddings for a list of chunks."""
         # Extract texts from chunks
         texts = [chunk["text"] for chunk in chunks]
         
-        logger.info(f"Generating embeddings for chunks", 
+        logger.info("Generating embeddings for chunks", 
                    count=len(texts), 
                    model=self.model, 
                    batch_size=batch_size)
@@ -196,116 +263,185 @@ class EmbeddingGenerator:
         
         return chunks
     
-    def process_file(self, input_file: str, output_file: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Process a file containing chunks and add embeddings."""
-        logger.info(f"Loading chunks from file", path=input_file)
+    def embed_chunk_stream(self, chunks: Iterable[Dict[str, Any]],
+                           batch_size: int = 20) -> Iterator[List[Dict[str, Any]]]:
+        """Embed chunks from an iterator, yielding each window as soon as it is done."""
+        # Several API batches per window keep the concurrent requests busy
+        window = batch_size * settings.embedding_concurrency
+        buffer: List[Dict[str, Any]] = []
+        for chunk in chunks:
+            buffer.append(chunk)
+            if len(buffer) >= window:
+                yield self.embed_chunks(buffer, batch_size)
+                buffer = []
+        if buffer:
+            yield self.embed_chunks(buffer, batch_size)
+    
+    def process_file(self, input_file: str, output_file: Optional[str] = None, batch_size: int = 20) -> int:
+        """Stream chunks from a file, add embeddings and return the number processed.
+
+        Input may be a JSON array or JSON Lines; output is written in the format its
+        extension implies, one window at a time, so memory stays bounded by a window.
+        """
+        logger.info("Loading chunks from file", path=input_file)
         
-        # Load chunks
         try:
-            with open(input_file, 'r', encoding='utf-8') as f:
-                chunks = json.load(f)
+            windows = self.embed_chunk_stream(iter_chunks(input_file), batch_size)
+            count = 0
             
-            logger.info(f"Loaded chunks from file", count=len(chunks))
+            if not output_file:
+                for window in windows:
+                    count += len(window)
+                return count
             
-            # Generate embeddings
-            chunks_with_embeddings = self.embed_chunks(chunks)
+            # Binary sidecar lets the indexers memory-map embeddings instead of parsing JSON
+            with ChunkWriter(output_file) as writer, \
+                    SidecarWriter(output_file, settings.embedding_dimensions) as sidecar:
+                for window in windows:
+                    writer.write(window)
+                    sidecar.write(window)
+                    count += len(window)
+                # Finish the JSON before the sidecar so the sidecar is never older
+                writer.close()
             
-            # Save to file if output_file is provided
-            if output_file:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(chunks_with_embeddings, f)
-                logger.info(f"Saved chunks with embeddings to file", 
-                           count=len(chunks_with_embeddings), 
-                           path=output_file)
+            logger.info("Saved chunks with embeddings to file", 
+                       count=count, 
+                       path=output_file)
             
-            return chunks_with_embeddings
+            return count
         except Exception as e:
             error_msg = f"Error processing file: {e}"
             logger.error(error_msg)
             raise APIError(error_msg, details={"input_file": input_file})
     
-    def _get_cache_path(self, text: str) -> str:
-        """Generate cache file path for a text."""
-        text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
-        return os.path.join(self.cache_dir, f"{text_hash}.json")
+    def _open_cache(self) -> None:
+        """Open the SQLite embedding store, creating its table if needed."""
+        self._cache_lock = threading.Lock()
+        self.cache_db = sqlite3.connect(os.path.join(self.cache_dir, CACHE_DB_FILENAME),
+                                        check_same_thread=False)
+        self.cache_db.execute(
+            "CREATE TABLE IF NOT EXISTS emb ("
+            "hash BLOB PRIMARY KEY, model TEXT, ts REAL, access_ts REAL, vec BLOB, "
+            "dtype TEXT DEFAULT 'float32', scale REAL DEFAULT 1.0)"
+        )
+        # Caches written before quantization hold float32 vectors without these columns
+        columns = {row[1] for row in self.cache_db.execute("PRAGMA table_info(emb)")}
+        if "dtype" not in columns:
+            self.cache_db.execute("ALTER TABLE emb ADD COLUMN dtype TEXT DEFAULT 'float32'")
+            self.cache_db.execute("ALTER TABLE emb ADD COLUMN scale REAL DEFAULT 1.0")
+        self.cache_db.execute("CREATE INDEX IF NOT EXISTS emb_access ON emb (access_ts)")
+        self.cache_db.commit()
+        
+        # Track the stored size in memory so writes don't re-sum the table
+        (total,) = self.cache_db.execute("SELECT COALESCE(SUM(length(vec)), 0) FROM emb").fetchone()
+        self._cache_bytes = total
+    
+    def _get_cache_key(self, text: str) -> bytes:
+        """Generate the cache key for a text."""
+        return hashlib.sha256(text.encode('utf-8')).digest()
     
     def _get_from_cache(self, text: str) -> Optional[List[float]]:
         """Get embedding from cache."""
-        cache_path = self._get_cache_path(text)
+        return self._get_many_from_cache([text])[0]
+    
+    def _get_many_from_cache(self, texts: List[str], as_array: bool = False) -> List[Optional[Sequence[float]]]:
+        """Get embeddings for several texts from cache in one query, None where missing."""
+        keys = [self._get_cache_key(text) for text in texts]
         
-        if os.path.exists(cache_path):
-            try:
-                with open(cache_path, 'r') as f:
-                    data = json.load(f)
-                return data.get("embedding")
-            except Exception as e:
-                logger.error(f"Error reading from cache", path=cache_path, error=str(e))
+        try:
+            with self._cache_lock:
+                placeholders = ",".join("?" * len(keys))
+                found = {key: (vec, dtype, scale) for key, vec, dtype, scale in self.cache_db.execute(
+                    f"SELECT hash, vec, dtype, scale FROM emb WHERE model = ? AND hash IN ({placeholders})",
+                    [self.model, *keys]
+                )}
+                if found:
+                    now = time.time()
+                    self.cache_db.executemany("UPDATE emb SET access_ts = ? WHERE hash = ?",
+                                              [(now, key) for key in found])
+                    self.cache_db.commit()
+        except Exception as e:
+            logger.error("Error reading from cache", error=str(e))
+            return [None] * len(texts)
         
-        return None
+        if as_array:
+            return [decode_embedding(*found[key]) if key in found else None for key in keys]
+        return [decode_embedding(*found[key]).tolist() if key in found else None
+                for key in keys]
     
     def _save_to_cache(self, text: str, embedding: List[float]) -> None:
         """Save embedding to cache."""
-        cache_path = self._get_cache_path(text)
+        self._save_many_to_cache([text], [embedding])
+    
+    def _save_many_to_cache(self, texts: List[str], embeddings: List[List[float]]) -> None:
+        """Save several embeddings to cache in one transaction."""
+        now = time.time()
+        dtype = settings.embedding_cache_dtype
+        rows = [
+            (self._get_cache_key(text), self.model, now, now,
+             *encode_embedding(embedding, dtype), dtype)
+            for text, embedding in zip(texts, embeddings)
+        ]
         
         try:
-            with open(cache_path, 'w') as f:
-                json.dump({
-                    "text_preview": text[:100] + "..." if len(text) > 100 else text,
-                    "model": self.model,
-                    "embedding": embedding,
-                    "timestamp": time.time()
-                }, f)
-            
-            # Manage cache size (simple LRU)
-            self._manage_cache_size()
+            with self._cache_lock:
+                # Replaced rows would otherwise be counted twice
+                placeholders = ",".join("?" * len(rows))
+                (replaced,) = self.cache_db.execute(
+                    f"SELECT COALESCE(SUM(length(vec)), 0) FROM emb WHERE hash IN ({placeholders})",
+                    [row[0] for row in rows]
+                ).fetchone()
+                self.cache_db.executemany(
+                    "INSERT OR REPLACE INTO emb (hash, model, ts, access_ts, vec, scale, dtype) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._cache_bytes += sum(len(row[4]) for row in rows) - replaced
+                
+                # Manage cache size (simple LRU)
+                self._manage_cache_size()
+                self.cache_db.commit()
         except Exception as e:
-            logger.error(f"Error writing to cache", path=cache_path, error=str(e))
+            logger.error("Error writing to cache", error=str(e))
     
     def _manage_cache_size(self) -> None:
-        """Manage cache size using LRU strategy."""
+        """Evict least recently used embeddings once the cache exceeds its budget."""
         max_size_bytes = int(settings.max_cache_size_gb * 1024 * 1024 * 1024)
+        if self._cache_bytes <= max_size_bytes:
+            return
         
-        # Get all cache files with their info
-        cache_files = []
-        for filename in os.listdir(self.cache_dir):
-            if filename.endswith('.json'):
-                filepath = os.path.join(self.cache_dir, filename)
-                try:
-                    stats = os.stat(filepath)
-                    cache_files.append({
-                        'path': filepath,
-                        'size': stats.st_size,
-                        'last_access': stats.st_atime
-                    })
-                except Exception:
-                    pass
-        
-        # Calculate total size
-        total_size = sum(f['size'] for f in cache_files)
+        # Entries normally share one width, so the overage converts to a row count
+        row_bytes = np.dtype(settings.embedding_cache_dtype).itemsize * settings.embedding_dimensions
+        removed_count = 0
+        while self._cache_bytes > max_size_bytes:
+            excess_rows = max(1, -(-(self._cache_bytes - max_size_bytes) // row_bytes))
+            deleted = self.cache_db.execute(
+                "DELETE FROM emb WHERE hash IN (SELECT hash FROM emb ORDER BY access_ts LIMIT ?)",
+                (excess_rows,)
+            ).rowcount
+            (self._cache_bytes,) = self.cache_db.execute(
+                "SELECT COALESCE(SUM(length(vec)), 0) FROM emb"
+            ).fetchone()
+            removed_count += deleted
+            if deleted == 0:
+                break
         
-        # If over limit, remove oldest files
-        if total_size > max_size_bytes:
-            # Sort by last access time (oldest first)
-            cache_files.sort(key=lambda x: x['last_access'])
-            
-            # Remove files until under limit
-            bytes_to_remove = total_size - max_size_bytes
-            bytes_removed = 0
-            removed_count = 0
-            
-            for file_info in cache_files:
-                if bytes_removed >= bytes_to_remove:
-                    break
-                
-                try:
-                    os.remove(file_info['path'])
-                    bytes_removed += file_info['size']
-                    removed_count += 1
-                except Exception:
-                    pass
-            
-            mb_removed = bytes_removed / 1024 / 1024
-            logger.info(f"Cache cleanup completed", 
-                       files_removed=removed_count, 
-                       mb_removed=f"{mb_removed:.2f}", 
-                       total_files=len(cache_files))
\ No newline at end of file
+        logger.info("Cache cleanup completed", 
+                   entries_removed=removed_count, 
+                   mb_remaining=f"{self._cache_bytes / 1024 / 1024:.2f}")
+
+class RateLimiter:
+    """Spaces out request starts so at most ``rate`` begin per ``period`` seconds."""
+    
+    def __init__(self, rate: int, period: float = 60.0):
+        """Initialize the limiter for a request budget."""
+        self.interval = period / rate
+        self._next_start = 0.0
+    
+    async def acquire(self) -> None:
+        """Wait until the next request slot is free."""
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
@@ -0,0 +1,330 @@
+"""
+FAISS vector index backend for PyTorch Documentation Search Tool.
+Stores normalized, quantized embeddings in an IVF index with a SQLite side table for documents.
+"""
+
+import os
+import json
+import math
+import sqlite3
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:  # faiss is an optional dependency
+    faiss = None
+
+from ptsearch.utils import logger
+from ptsearch.utils.error import ConfigError, DatabaseError
+from ptsearch.config import settings
+from ptsearch.core.chunk_store import chunk_metadata, has_sidecar, iter_chunks, load_chunks
+
+# Below this many vectors IVF cannot be trained reliably, so use exhaustive search
+MIN_TRAIN_VECTORS = 10000
+# Upper bound on the number of vectors used to train the coarse quantizer
+MAX_TRAIN_VECTORS = 100000
+
+# Scalar vector encodings for settings.faiss_quant_mode; "pq" uses product quantization
+QUANT_ENCODINGS = {
+    "int8": "SQ8",
+    "fp16": "SQfp16",
+    "fp32": "Flat",
+}
+
+INDEX_FILENAME = "faiss.index"
+META_FILENAME = "faiss_meta.sqlite"
+
+
+class FaissBackend:
+    """Manages storage and retrieval of document chunks in a FAISS index.
+
+    Drop-in alternative to ``DatabaseManager``: vectors are L2-normalized at insert
+    time so inner product equals cosine similarity, and FAISS row ids are resolved
+    to documents and metadata through a SQLite table. Stores below ``MIN_TRAIN_VECTORS``
+    use an exhaustive index, which is retrained as IVF once an add crosses that size;
+    the IVF cell count is fixed at that point and not revisited as the index grows.
+    """
+
+    def __init__(self, db_dir: str = settings.db_dir, collection_name: str = settings.collection_name,
+                 nprobe: int = settings.faiss_nprobe, quant_mode: str = settings.faiss_quant_mode):
+        """Initialize FAISS backend, loading a persisted index if present."""
+        if faiss is None:
+            error_msg = "FAISS backend requires the faiss-cpu package"
+            logger.error(error_msg)
+            raise ConfigError(error_msg)
+
+        self.db_dir = db_dir
+        self.collection_name = collection_name
+        self.nprobe = nprobe
+        self.quant_mode = quant_mode
+        self.dimensions = settings.embedding_dimensions
+        self.index_path = os.path.join(db_dir, INDEX_FILENAME)
+        self.index = None
+
+        # Create directory if it doesn't exist
+        os.makedirs(db_dir, exist_ok=True)
+
+        try:
+            self.meta = sqlite3.connect(os.path.join(db_dir, META_FILENAME), check_same_thread=False)
+            self.meta.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "row INTEGER PRIMARY KEY, id TEXT, document TEXT, metadata TEXT)"
+            )
+            self.meta.commit()
+
+            if os.path.exists(self.index_path):
+                self.index = faiss.read_index(self.index_path)
+                self._apply_nprobe(self.index)
+                logger.info("Loaded FAISS index", path=self.index_path, vectors=self.index.ntotal)
+        except Exception as e:
+            error_msg = f"Error initializing FAISS backend: {e}"
+            logger.error(error_msg)
+            raise DatabaseError(error_msg)
+
+    def reset_collection(self) -> None:
+        """Drop the index and all stored documents."""
+        self.index = None
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        self.meta.execute("DELETE FROM chunks")
+        self.meta.commit()
+        logger.info("Reset FAISS index", path=self.index_path)
+
+    def add_chunks(self, chunks: List[Dict[str, Any]], batch_size: int = 50,
+                   embeddings: Optional[np.ndarray] = None) -> None:
+        """Add chunks to the index in batches of ``batch_size``, (re)building it first if necessary."""
+        if not chunks:
+            return
+        
+        try:
+            start_row = self.index.ntotal if self.index is not None else 0
+            total = start_row + len(chunks)
+            if self.index is None or (total >= MIN_TRAIN_VECTORS and self._ivf(self.index) is None):
+                self.index = self._rebuild_index(chunks, embeddings, total)
+            
+            # Normalize and add one batch at a time so only a batch-sized copy is held
+            batch_size = max(1, batch_size)
+            for start in range(0, len(chunks), batch_size):
+                end = min(start + batch_size, len(chunks))
+                self.index.add(self._batch_vectors(chunks, embeddings, start, end))
+            
+            self.meta.executemany(
+                "INSERT INTO chunks (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                (
+                    (start_row + idx,
+                     str(chunk.get("id", start_row + idx)),
+                     chunk.get("text", ""),
+                     json.dumps(chunk_metadata(chunk)))
+                    for idx, chunk in enumerate(chunks)
+                )
+            )
+            self.meta.commit()
+            
+            faiss.write_index(self.index, self.index_path)
+            logger.info("Added chunks to FAISS index", count=len(chunks), total=self.index.ntotal)
+        except Exception as e:
+            error_msg = f"Error adding chunks to FAISS index: {e}"
+            logger.error(error_msg)
+            raise DatabaseError(error_msg, details={"chunks": len(chunks)})
+    
+    def query(self, query_embedding: List[float], n_results: int = 5,
+              filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Query the index with vector search, returning ChromaDB-shaped results."""
+        if self.index is None or self.index.ntotal == 0:
+            return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+        vector = self._to_matrix([query_embedding])
+        faiss.normalize_L2(vector)
+
+        try:
+            params = self._search_params(filters)
+            if params is False:
+                # No stored chunk matches the filters
+                return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+            if params is None:
+                scores, rows = self.index.search(vector, n_results)
+            else:
+                scores, rows = self.index.search(vector, n_results, params=params)
+
+            hits = [(int(row), float(score)) for row, score in zip(rows[0], scores[0]) if row >= 0]
+            records = self._fetch_rows([row for row, _ in hits])
+
+            ids, documents, metadatas, distances = [], [], [], []
+            for row, score in hits:
+                if row not in records:
+                    continue
+                chunk_id, document, metadata = records[row]
+                ids.append(chunk_id)
+                documents.append(document)
+                metadatas.append(metadata)
+                # Report cosine distance for parity with ChromaDB
+                distances.append(1.0 - score)
+
+            if ids:
+                logger.info("Query completed", results_count=len(ids))
+
+            return {
+                "ids": [ids],
+                "documents": [documents],
+                "metadatas": [metadatas],
+                "distances": [distances]
+            }
+        except Exception as e:
+            error_msg = f"Error during query: {e}"
+            logger.error(error_msg)
+            raise DatabaseError(error_msg)
+
+    def load_from_file(self, filepath: str, reset: bool = True, batch_size: int = 50) -> None:
+        """Load chunks from a file into the FAISS index."""
+        logger.info("Loading chunks from file", path=filepath)
+
+        try:
+            embeddings = None
+            if has_sidecar(filepath):
+                chunks, embeddings = load_chunks(filepath)
+            else:
+                chunks = list(iter_chunks(filepath))
+
+            logger.info("Loaded chunks from file", count=len(chunks))
+
+            if reset:
+                self.reset_collection()
+
+            self.add_chunks(chunks, batch_size, embeddings=embeddings)
+
+            logger.info("Successfully loaded chunks into FAISS index", count=len(chunks))
+        except Exception as e:
+            error_msg = f"Error loading from file: {e}"
+            logger.error(error_msg)
+            raise DatabaseError(error_msg, details={"filepath": filepath})
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get basic statistics about the index."""
+        return {
+            "total_chunks": self.index.ntotal if self.index is not None else 0,
+            "collection_name": self.collection_name,
+            "db_dir": self.db_dir,
+            "backend": "faiss",
+            "index_type": type(self.index).__name__ if self.index is not None else None
+        }
+
+    def _batch_vectors(self, chunks: List[Dict[str, Any]], embeddings: Optional[np.ndarray],
+                       start: int, end: int) -> np.ndarray:
+        """Return rows ``start:end`` as a normalized, contiguous float32 matrix."""
+        if embeddings is None:
+            vectors = self._to_matrix([chunk.get("embedding") for chunk in chunks[start:end]])
+        else:
+            # Copy out of any read-only memory map, since normalization is in place
+            vectors = np.array(embeddings[start:end], dtype=np.float32, order="C")
+        faiss.normalize_L2(vectors)
+        return vectors
+    
+    def _rebuild_index(self, chunks: List[Dict[str, Any]], embeddings: Optional[np.ndarray], total: int):
+        """Build an index sized for ``total`` vectors, carrying over any already stored.
+
+        Called for the first add, and again when an exhaustive index grows past
+        ``MIN_TRAIN_VECTORS`` so that it is retrained as IVF.
+        """
+        if self.index is not None and self.index.ntotal:
+            existing = self.index.reconstruct_n(0, self.index.ntotal)
+            logger.info("Rebuilding FAISS index", existing_vectors=existing.shape[0], total=total)
+        else:
+            existing = np.empty((0, self.dimensions), dtype=np.float32)
+        
+        # Train on the stored vectors plus a random sample of the new ones to bound k-means cost
+        budget = max(0, MAX_TRAIN_VECTORS - existing.shape[0])
+        rows = np.arange(len(chunks))
+        if len(chunks) > budget:
+            rows = np.sort(np.random.default_rng(0).choice(len(chunks), budget, replace=False))
+        if embeddings is None:
+            sample = self._to_matrix([chunks[row].get("embedding") for row in rows])
+        else:
+            sample = np.array(embeddings[rows], dtype=np.float32, order="C")
+        faiss.normalize_L2(sample)
+        
+        index = self._build_index(np.vstack([existing, sample]), total)
+        if existing.shape[0]:
+            index.add(existing)
+        return index
+    
+    def _build_index(self, training: np.ndarray, count: int):
+        """Create and train an index sized for ``count`` vectors."""
+        quant_mode = self.quant_mode
+        encoding = f"PQ{settings.faiss_pq_m}" if quant_mode == "pq" else QUANT_ENCODINGS[quant_mode]
+        
+        if count < MIN_TRAIN_VECTORS:
+            # PQ needs a large training set; keep exact codes for small corpora
+            flat_encoding = "Flat" if quant_mode == "pq" else encoding
+            logger.info("Using exhaustive inner-product index", vectors=count, encoding=flat_encoding)
+            index = faiss.index_factory(self.dimensions, flat_encoding, faiss.METRIC_INNER_PRODUCT)
+            index.train(training)
+            return index
+        
+        nlist = max(1, int(math.sqrt(count)))
+        index = faiss.index_factory(
+            self.dimensions, f"IVF{nlist},{encoding}", faiss.METRIC_INNER_PRODUCT
+        )
+        
+        logger.info("Training IVF index", nlist=nlist, encoding=encoding,
+                    training_vectors=training.shape[0])
+        index.train(training)
+        self._apply_nprobe(index)
+        return index
+    
+    def _apply_nprobe(self, index) -> None:
+        """Set the number of probed cells on IVF indexes."""
+        ivf = self._ivf(index)
+        if ivf is not None:
+            ivf.nprobe = self.nprobe
+
+    @staticmethod
+    def _ivf(index):
+        """Return the IVF layer of an index, or None for exhaustive indexes."""
+        try:
+            return faiss.extract_index_ivf(index)
+        except RuntimeError:
+            return None
+
+    def _search_params(self, filters: Optional[Dict[str, Any]]):
+        """Build search parameters restricting results to rows matching filters."""
+        if not filters:
+            return None
+
+        clauses = " AND ".join("json_extract(metadata, ?) = ?" for _ in filters)
+        values = []
+        for key, value in filters.items():
+            values.extend((f"$.{key}", value))
+
+        rows = [row for (row,) in self.meta.execute(f"SELECT row FROM chunks WHERE {clauses}", values)]
+        if not rows:
+            return False
+
+        selector = faiss.IDSelectorBatch(np.asarray(rows, dtype=np.int64))
+        if self._ivf(self.index) is None:
+            return faiss.SearchParameters(sel=selector)
+        return faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+
+    def _fetch_rows(self, rows: List[int]) -> Dict[int, Any]:
+        """Resolve FAISS row ids to (id, document, metadata) tuples."""
+        if not rows:
+            return {}
+
+        placeholders = ",".join("?" * len(rows))
+        cursor = self.meta.execute(
+            f"SELECT row, id, document, metadata FROM chunks WHERE row IN ({placeholders})", rows
+        )
+        return {row: (chunk_id, document, json.loads(metadata))
+                for row, chunk_id, document, metadata in cursor}
+
+    def _to_matrix(self, embeddings: List[Any]) -> np.ndarray:
+        """Stack embeddings into a contiguous float32 matrix of the configured width."""
+        matrix = np.zeros((len(embeddings), self.dimensions), dtype=np.float32)
+        for i, embedding in enumerate(embeddings):
+            if embedding is None or len(embedding) == 0:
+                continue
+            vector = np.asarray(embedding, dtype=np.float32).ravel()[:self.dimensions]
+            matrix[i, :vector.shape[0]] = vector
+        return matrix
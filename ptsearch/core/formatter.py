@@ -3,18 +3,28 @@ Result formatter module for PyTorch Documentation Search Tool.
 Formats and ranks search results.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Sequence
+
+import numpy as np
 
 from ptsearch.utils import logger
 from ptsearch.utils.error import SearchError
 
+# Documents longer than this are truncated in result snippets
+MAX_SNIPPET_LENGTH = 250
+
+
+def _column(results: Dict[str, Any], key: str) -> Sequence[Any]:
+    """Return a result column, treating a missing key like an empty one."""
+    values = results.get(key)
+    return [] if values is None else values
+
+
 class ResultFormatter:
     """Formats and ranks search results."""
     
     def format_results(self, results: Dict[str, Any], query: str) -> Dict[str, Any]:
         """Format raw ChromaDB results into a structured response."""
-        formatted_results = []
-        
         # Handle empty results
         if results is None:
             logger.warning("Received None results to format")
@@ -24,66 +34,8 @@ class ResultFormatter:
                 "count": 0
             }
         
-        # Extract data from ChromaDB response
         try:
-            if isinstance(results.get('documents'), list):
-                if len(results['documents']) > 0 and isinstance(results['documents'][0], list):
-                    # Nested lists format (older ChromaDB versions)
-                    documents = results.get('documents', [[]])[0]
-                    metadatas = results.get('metadatas', [[]])[0]
-                    distances = results.get('distances', [[]])[0]
-                else:
-                    # Flat lists format (newer ChromaDB versions)
-                    documents = results.get('documents', [])
-                    metadatas = results.get('metadatas', [])
-                    distances = results.get('distances', [])
-            else:
-                # Empty or unexpected format
-                documents = []
-                metadatas = []
-                distances = []
-                
-            # Log the number of results
-            logger.info(f"Formatting search results", count=len(documents))
-            
-            # Format each result
-            for i, (doc, metadata, distance) in enumerate(zip(documents, metadatas, distances)):
-                # Create snippet
-                max_snippet_length = 250
-                snippet = doc[:max_snippet_length] + "..." if len(doc) > max_snippet_length else doc
-                
-                # Convert distance to similarity score (1.0 is exact match)
-                if isinstance(distance, (int, float)):
-                    similarity = 1.0 - distance
-                else:
-                    similarity = 0.5  # Default if distance is not a scalar
-                
-                # Extract metadata fields with fallbacks
-                if isinstance(metadata, dict):
-                    title = metadata.get("title", f"Result {i+1}")
-                    source = metadata.get("source", "")
-                    chunk_type = metadata.get("chunk_type", "unknown")
-                    language = metadata.get("language", "")
-                    section = metadata.get("section", "")
-                else:
-                    # Handle unexpected metadata format
-                    logger.warning(f"Unexpected metadata format", type=str(type(metadata)))
-                    title = f"Result {i+1}"
-                    source = ""
-                    chunk_type = "unknown"
-                    language = ""
-                    section = ""
-                
-                # Add formatted result
-                formatted_results.append({
-                    "title": title,
-                    "snippet": snippet,
-                    "source": source,
-                    "chunk_type": chunk_type,
-                    "language": language,
-                    "section": section,
-                    "score": round(float(similarity), 4)
-                })
+            formatted_results = list(self.format_results_iter(results))
         except Exception as e:
             error_msg = f"Error formatting results: {e}"
             logger.error(error_msg)
@@ -96,45 +48,116 @@ class ResultFormatter:
             "count": len(formatted_results)
         }
     
-    def rank_results(self, results: Dict[str, Any], is_code_query: bool) -> Dict[str, Any]:
-        """Rank results based on query type with intelligent scoring."""
-        if "results" not in results or not results["results"]:
+    def format_results_iter(self, results: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Yield formatted result rows from a raw ChromaDB response one at a time."""
+        # Extract data from ChromaDB response; columns may be lists or NumPy arrays
+        documents = _column(results, 'documents')
+        metadatas = _column(results, 'metadatas')
+        distances = _column(results, 'distances')
+        if len(documents) and isinstance(documents[0], (list, np.ndarray)):
+            # Nested format, one row per query embedding
+            documents = documents[0]
+            metadatas = metadatas[0] if len(metadatas) else []
+            distances = distances[0] if len(distances) else []
+            
+        # Log the number of results
+        logger.info(f"Formatting search results", count=len(documents))
+        
+        # Score all rows in one array pass; zip stops at the shortest list
+        count = min(len(documents), len(metadatas), len(distances))
+        scores = self._similarity_scores(distances[:count])
+        
+        # Format each result
+        for i, (doc, metadata, score) in enumerate(zip(documents, metadatas, scores)):
+            # Extract metadata fields with fallbacks; the store returns dicts, so don't type-check each row
+            try:
+                get = metadata.get
+            except AttributeError:
+                # Handle unexpected metadata format
+                logger.warning(f"Unexpected metadata format", type=str(type(metadata)))
+                get = {}.get
+            
+            yield {
+                "title": get("title", f"Result {i+1}"),
+                "snippet": doc[:MAX_SNIPPET_LENGTH] + "..." if len(doc) > MAX_SNIPPET_LENGTH else doc,
+                "source": get("source", ""),
+                "chunk_type": get("chunk_type", "unknown"),
+                "language": get("language", ""),
+                "section": get("section", ""),
+                "score": score
+            }
+    
+    @staticmethod
+    def _similarity_scores(distances: Sequence[Any]) -> List[float]:
+        """Convert distances to rounded similarity scores (1.0 is exact match), 0.5 for non-scalars."""
+        try:
+            values = np.asarray(distances, dtype=np.float64)
+        except (TypeError, ValueError):
+            values = None
+        
+        if values is None or values.ndim != 1:
+            # Mixed or nested entries; score them one at a time
+            return [round(1.0 - float(d), 4) if isinstance(d, (int, float)) else 0.5 for d in distances]
+        
+        similarities = np.where(np.isnan(values), 0.5, 1.0 - values)
+        return [round(similarity, 4) for similarity in similarities.tolist()]
+    
+    def rank_results(self, results: Dict[str, Any], is_code_query: bool,
+                     top_k: Optional[int] = None) -> Dict[str, Any]:
+        """Rank results based on query type with intelligent scoring, keeping the best top_k.
+
+        ``results["results"]`` may be any iterable of rows, e.g. from ``format_results_iter``.
+        """
+        if "results" not in results:
             return results
         
         formatted_results = results["results"]
+        if not isinstance(formatted_results, list):
+            formatted_results = results["results"] = list(formatted_results)
+        if not formatted_results:
+            return results
+        count = len(formatted_results)
         
         # Set up ranking parameters
         boost_factor = 1.2  # 20% boost for matching content type
         title_boost = 1.1   # 10% boost for matches in title
+        preferred_type = "code" if is_code_query else "text"
+        match_reason = "code query & code content" if is_code_query else "concept query & text content"
+        query_terms = [term for term in results.get("query", "").lower().split() if len(term) > 3]
         
-        for result in formatted_results:
-            base_score = result["score"]
-            
-            # Apply content type boosting
-            if is_code_query and result.get("chunk_type") == "code":
-                result["score"] = min(1.0, base_score * boost_factor)
-                result["match_reason"] = "code query & code content"
-            elif not is_code_query and result.get("chunk_type") == "text":
-                result["score"] = min(1.0, base_score * boost_factor)
-                result["match_reason"] = "concept query & text content"
-            
-            # Additional boosting for title matches
-            title = result.get("title", "").lower()
-            query_terms = results.get("query", "").lower().split()
-            
-            title_match = any(term in title for term in query_terms if len(term) > 3)
-            if title_match:
-                result["score"] = min(1.0, result["score"] * title_boost)
+        # Apply content type and title boosting to all scores at once
+        scores = np.fromiter((result["score"] for result in formatted_results), dtype=np.float64, count=count)
+        type_match = np.fromiter((result.get("chunk_type") == preferred_type for result in formatted_results),
+                                 dtype=bool, count=count)
+        title_match = np.fromiter(
+            (any(term in result.get("title", "").lower() for term in query_terms) for result in formatted_results),
+            dtype=bool, count=count
+        )
+        scores = np.where(type_match, np.minimum(1.0, scores * boost_factor), scores)
+        scores = np.where(title_match, np.minimum(1.0, scores * title_boost), scores)
+        
+        # Round score for consistency
+        rounded = [round(score, 4) for score in scores.tolist()]
+        for result, score, type_matched, title_matched in zip(formatted_results, rounded,
+                                                              type_match.tolist(), title_match.tolist()):
+            result["score"] = score
+            if type_matched:
+                result["match_reason"] = match_reason
+            if title_matched:
                 result["title_match"] = True
-            
-            # Round score for consistency
-            result["score"] = round(result["score"], 4)
         
-        # Re-sort by score
-        formatted_results.sort(key=lambda x: x["score"], reverse=True)
+        # Re-sort by score, partitioning out the top_k first when only those are kept
+        neg_scores = -np.asarray(rounded)
+        if top_k is not None and 0 < top_k < count:
+            order = np.sort(np.argpartition(neg_scores, top_k - 1)[:top_k])
+        else:
+            order = np.arange(count)
+        order = order[np.argsort(neg_scores[order], kind="stable")]
+        formatted_results = [formatted_results[i] for i in order.tolist()]
         
         # Update results
         results["results"] = formatted_results
+        results["count"] = len(formatted_results)
         results["is_code_query"] = is_code_query
         
         # Log ranking results
@@ -3,27 +3,79 @@ Search module for PyTorch Documentation Search Tool.
 Combines embedding generation, database querying, and result formatting.
 """
 
-from typing import List, Dict, Any, Optional
+import asyncio
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import re
 import time
+import threading
+
+import numpy as np
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is an optional speedup
+    ahocorasick = None
 
 from ptsearch.utils import logger
 from ptsearch.utils.error import SearchError
 from ptsearch.config import settings
 from ptsearch.core.formatter import ResultFormatter
 from ptsearch.core.database import DatabaseManager
-from ptsearch.core.embedding import EmbeddingGenerator
+from ptsearch.core.embedding import EmbeddingGenerator, _ZERO_EMBEDDING
+
+# Keywords suggesting the user wants code, matched case-insensitively
+_CODE_INDICATORS = frozenset([
+    "code", "example", "implementation", "function", "class", "method",
+    "snippet", "syntax", "parameter", "argument", "return", "import",
+    "module", "api", "call", "invoke", "instantiate", "create", "initialize"
+])
+
+# Code syntax fragments, matched case-sensitively
+_CODE_FRAGMENTS = (
+    "def ", "class ", "import ", "from ", "torch.", "nn.",
+    "->", "=>", "==", "!=", "+=", "-=", "*=", "():", "@"
+)
+_CODE_PATTERN = re.compile("|".join(map(re.escape, _CODE_FRAGMENTS)))
+
+# Metadata filters for the chunk types the tool descriptor advertises; never mutated
+_CHUNK_TYPE_FILTERS = {chunk_type: {"chunk_type": chunk_type} for chunk_type in ("code", "text")}
+
+
+def _build_automaton(words):
+    """Build an Aho-Corasick automaton that finds any of the words in one pass."""
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
+
+if ahocorasick is not None:
+    _INDICATOR_AUTOMATON = _build_automaton(_CODE_INDICATORS)
+    _FRAGMENT_AUTOMATON = _build_automaton(_CODE_FRAGMENTS)
+else:
+    _INDICATOR_AUTOMATON = _FRAGMENT_AUTOMATON = None
 
 class SearchEngine:
     """Main search engine that combines all components."""
     
     def __init__(self, database_manager: Optional[DatabaseManager] = None, 
-                 embedding_generator: Optional[EmbeddingGenerator] = None):
+                 embedding_generator: Optional[EmbeddingGenerator] = None,
+                 query_cache_size: int = settings.query_cache_size,
+                 query_cache_ttl: float = settings.query_cache_ttl_seconds):
         """Initialize search engine with components."""
         # Initialize components if not provided
         self.database = database_manager or DatabaseManager()
         self.embedder = embedding_generator or EmbeddingGenerator()
         self.formatter = ResultFormatter()
         
+        # Recent query embeddings as (created, embedding), least recently used first
+        self.query_cache_size = query_cache_size
+        self.query_cache_ttl = query_cache_ttl
+        self._query_cache: "OrderedDict[str, Tuple[float, Sequence[float]]]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        
         logger.info("Search engine initialized")
     
     def search(self, query: str, num_results: int = settings.max_results, 
@@ -45,8 +97,8 @@ class SearchEngine:
                        is_code_query=query_data["is_code_query"],
                        filter=filter_type)
             
-            # Create filters
-            filters = {"chunk_type": filter_type} if filter_type else None
+            # Create filters, sharing the prebuilt ones for the advertised chunk types
+            filters = _CHUNK_TYPE_FILTERS.get(filter_type) or ({"chunk_type": filter_type} if filter_type else None)
             
             # Query database
             db_start = time.time()
@@ -68,7 +120,8 @@ class SearchEngine:
             rank_start = time.time()
             ranked_results = self.formatter.rank_results(
                 formatted_results,
-                query_data["is_code_query"]
+                query_data["is_code_query"],
+                top_k=num_results
             )
             rank_end = time.time()
             timing["rank_results"] = rank_end - rank_start
@@ -84,7 +137,9 @@ class SearchEngine:
                 "total_time": total_time,
                 "result_count": result_count,
                 "is_code_query": query_data["is_code_query"],
-                "filter": filter_type
+                "filter": filter_type,
+                # True when the embedding call failed and the zero vector was searched instead
+                "embedding_fallback": query_data["embedding"] is _ZERO_EMBEDDING
             }
             
             logger.info("Search completed", 
@@ -103,13 +158,18 @@ class SearchEngine:
                 "time_taken": time.time() - start_time
             })
     
+    async def asearch(self, query: str, num_results: int = settings.max_results,
+                      filter_type: Optional[str] = None) -> Dict[str, Any]:
+        """Run search in a worker thread so concurrent queries overlap their embedding and DB round trips."""
+        return await asyncio.to_thread(self.search, query, num_results, filter_type)
+    
     def _process_query(self, query: str) -> Dict[str, Any]:
         """Process query to determine intent and generate embedding."""
         # Clean query
         query = query.strip()
         
-        # Generate embedding
-        embedding = self.embedder.generate_embedding(query)
+        # Generate embedding, reusing a recent one for the same query
+        embedding = self._embed_query(query)
         
         # Determine if this is a code query
         is_code_query = self._is_code_query(query)
@@ -120,30 +180,39 @@ class SearchEngine:
             "is_code_query": is_code_query
         }
     
-    def _is_code_query(self, query: str) -> bool:
-        """Determine if a query is looking for code."""
-        query_lower = query.lower()
-        
-        # Code indicator keywords
-        code_indicators = [
-            "code", "example", "implementation", "function", "class", "method",
-            "snippet", "syntax", "parameter", "argument", "return", "import",
-            "module", "api", "call", "invoke", "instantiate", "create", "initialize"
-        ]
+    def _embed_query(self, query: str) -> Sequence[float]:
+        """Embed a query through an in-process LRU cache keyed on the whitespace-normalized text."""
+        if self.query_cache_size <= 0:
+            return self.embedder.generate_embedding(query)
         
-        # Check for code indicators
-        for indicator in code_indicators:
-            if indicator in query_lower:
-                return True
+        key = " ".join(query.split())
+        with self._query_cache_lock:
+            entry = self._query_cache.get(key)
+            if entry is not None:
+                if not self.query_cache_ttl or time.monotonic() - entry[0] < self.query_cache_ttl:
+                    self._query_cache.move_to_end(key)
+                    return entry[1]
+                del self._query_cache[key]
         
-        # Check for code patterns
-        code_patterns = [
-            "def ", "class ", "import ", "from ", "torch.", "nn.",
-            "->", "=>", "==", "!=", "+=", "-=", "*=", "():", "@"
-        ]
+        embedding = self.embedder.generate_embedding(key)
+        # Don't pin the zero fallback from a failed API call
+        if embedding is _ZERO_EMBEDDING:
+            return embedding
         
-        for pattern in code_patterns:
-            if pattern in query:
-                return True
-        
-        return False
\ No newline at end of file
+        # Callers share cached vectors, so make them read-only
+        embedding = np.asarray(embedding, dtype=np.float32)
+        embedding.flags.writeable = False
+        with self._query_cache_lock:
+            self._query_cache[key] = (time.monotonic(), embedding)
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return embedding
+    
+    def _is_code_query(self, query: str) -> bool:
+        """Determine if a query is looking for code."""
+        query_lower = query.lower()
+        if _INDICATOR_AUTOMATON is not None:
+            return (next(_INDICATOR_AUTOMATON.iter(query_lower), None) is not None
+                    or next(_FRAGMENT_AUTOMATON.iter(query), None) is not None)
+        return any(indicator in query_lower for indicator in _CODE_INDICATORS) or bool(_CODE_PATTERN.search(query))
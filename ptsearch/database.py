@@ -8,17 +8,16 @@ import json
 from typing import List, Dict, Any, Optional
 
 import chromadb
+import numpy as np
 
-from ptsearch.config import (
-    DB_DIR, 
-    COLLECTION_NAME, 
-    EMBEDDING_DIMENSIONS,
-    DEFAULT_EMBEDDINGS_PATH,
-    logger
-)
+from ptsearch.config import settings
+from ptsearch.utils import logger
+
+# Resize warnings already logged; each kind is reported once per process
+_resize_warnings = set()
 
 class DatabaseManager:
-    def __init__(self, db_dir: str = DB_DIR, collection_name: str = COLLECTION_NAME):
+    def __init__(self, db_dir: str = settings.db_dir, collection_name: str = settings.collection_name):
         """Initialize database manager for ChromaDB."""
         self.db_dir = db_dir
         self.collection_name = collection_name
@@ -49,7 +48,6 @@ class DatabaseManager:
             metadata={"hnsw:space": "cosine"}
         )
         logger.info(f"Created new collection '{self.collection_name}'")
-        print(f"Created new collection '{self.collection_name}'")
     
     def get_collection(self):
         """Get or create the collection."""
@@ -75,12 +73,13 @@ class DatabaseManager:
         ids = [chunk["id"] for chunk in chunks]
         embeddings = [self._ensure_vector_format(chunk["embedding"]) for chunk in chunks]
         documents = [chunk["text"] for chunk in chunks]
-        metadatas = [chunk["metadata"] for chunk in chunks]
+        # Split chunks share their section's metadata and carry the chunk number alongside it
+        metadatas = [{**chunk["metadata"], "chunk": chunk["chunk"]} if "chunk" in chunk else chunk["metadata"]
+                     for chunk in chunks]
         
         # Add data in batches
         total_batches = (len(chunks) - 1) // batch_size + 1
         logger.info(f"Adding {len(chunks)} chunks in {total_batches} batches")
-        print(f"Adding {len(chunks)} chunks in {total_batches} batches")
         
         for i in range(0, len(chunks), batch_size):
             end_idx = min(i + batch_size, len(chunks))
@@ -93,15 +92,15 @@ class DatabaseManager:
                     documents=documents[i:end_idx],
                     metadatas=metadatas[i:end_idx]
                 )
-                logger.info(f"Added batch {batch_num}/{total_batches} ({end_idx - i} chunks)")
+                logger.debug("Added batch %d/%d (%d chunks)", batch_num, total_batches, end_idx - i)
                 
-                # Print progress every 1,000 chunks to prevent timeouts
+                # Report progress every 1,000 chunks to prevent timeouts
                 if (i // 1000) * 1000 == i or end_idx == len(chunks):
-                    print(f"Progress: {end_idx}/{len(chunks)} chunks indexed ({end_idx/len(chunks):.1%})")
+                    logger.info("Progress: %d/%d chunks indexed (%.1f%%)",
+                                end_idx, len(chunks), 100 * end_idx / len(chunks))
                 
             except Exception as e:
                 logger.error(f"Error adding batch {batch_num}: {e}")
-                print(f"Error adding batch {batch_num}: {e}")
     
     def query(self, query_embedding: List[float], n_results: int = 5, 
               filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -152,7 +151,6 @@ class DatabaseManager:
     def load_from_file(self, filepath: str, reset: bool = True, batch_size: int = 50) -> None:
         """Load chunks from a file into ChromaDB."""
         logger.info(f"Loading chunks from {filepath}")
-        print(f"Loading chunks from {filepath}")
         
         # Load the chunks
         try:
@@ -160,7 +158,6 @@ class DatabaseManager:
                 chunks = json.load(f)
             
             logger.info(f"Loaded {len(chunks)} chunks from file")
-            print(f"Loaded {len(chunks)} chunks from file")
             
             # Reset collection if requested
             if reset:
@@ -170,10 +167,8 @@ class DatabaseManager:
             self.add_chunks(chunks, batch_size)
             
             logger.info(f"Successfully loaded {len(chunks)} chunks into ChromaDB")
-            print(f"Successfully loaded {len(chunks)} chunks into ChromaDB")
         except Exception as e:
             logger.error(f"Error loading from file: {e}")
-            print(f"Error loading from file: {e}")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get basic statistics about the collection."""
@@ -199,7 +194,7 @@ class DatabaseManager:
         """Ensure vector is in the correct format for ChromaDB."""
         # Handle empty or None embeddings
         if not embedding:
-            return [0.0] * EMBEDDING_DIMENSIONS
+            return [0.0] * settings.embedding_dimensions
         
         # Handle NumPy arrays
         if hasattr(embedding, "tolist"):
@@ -210,16 +205,22 @@ class DatabaseManager:
             embedding = [float(x) for x in embedding]
         except Exception as e:
             logger.error(f"Error converting embedding values to float: {e}")
-            return [0.0] * EMBEDDING_DIMENSIONS
+            return [0.0] * settings.embedding_dimensions
         
         # Verify dimensions
-        if len(embedding) != EMBEDDING_DIMENSIONS:
-            # Pad or truncate if necessary
-            if len(embedding) < EMBEDDING_DIMENSIONS:
-                logger.warning(f"Padding embedding from {len(embedding)} to {EMBEDDING_DIMENSIONS} dimensions")
-                embedding.extend([0.0] * (EMBEDDING_DIMENSIONS - len(embedding)))
+        if len(embedding) != settings.embedding_dimensions:
+            # Pad or truncate in NumPy rather than building lists of zeros
+            vector = np.asarray(embedding, dtype=np.float32)
+            if vector.size < settings.embedding_dimensions:
+                if "pad" not in _resize_warnings:
+                    _resize_warnings.add("pad")
+                    logger.warning(f"Padding embedding from {vector.size} to {settings.embedding_dimensions} dimensions")
+                vector = np.pad(vector, (0, settings.embedding_dimensions - vector.size))
             else:
-                logger.warning(f"Truncating embedding from {len(embedding)} to {EMBEDDING_DIMENSIONS} dimensions")
-                embedding = embedding[:EMBEDDING_DIMENSIONS]
+                if "truncate" not in _resize_warnings:
+                    _resize_warnings.add("truncate")
+                    logger.warning(f"Truncating embedding from {vector.size} to {settings.embedding_dimensions} dimensions")
+                vector = vector[:settings.embedding_dimensions]
+            embedding = vector.tolist()
         
         return embedding
\ No newline at end of file
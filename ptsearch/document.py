@@ -5,22 +5,178 @@ Handles parsing and chunking of documents with code-aware processing.
 
 import os
 import re
-import uuid
-import glob
+import time
 import json
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Set
 
 # Using tree-sitter for code parsing
 from tree_sitter_languages import get_parser
 
-from ptsearch.config import CHUNK_SIZE, OVERLAP_SIZE, DEFAULT_CHUNKS_PATH, logger
+from ptsearch.config import settings
+from ptsearch.utils import logger
+from ptsearch.utils.chunk_io import ChunkWriter
+
+# Below this many files, worker start-up costs more than parallel parsing saves
+MIN_PARALLEL_FILES = 8
+
+# Patterns used while chunking, compiled once at import; for these splits the compiled
+# regexes beat hand-written str.find loops, which pay per-newline interpreter overhead
+_TITLE_RE = re.compile(r'^#\s+(.+)$', re.MULTILINE)
+_PARA_SPLIT_RE = re.compile(r'\n\s*\n')
+_SENT_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Line prefixes marking functions, classes, decorators, section comments and main blocks
+CODE_CHUNK_PREFIXES = ('def ', 'class ', '@', '# ', 'if __name__')
+
+# File types picked up from documentation directories
+MARKDOWN_EXTENSIONS = frozenset({'.md', '.markdown'})
+DOC_EXTENSIONS = MARKDOWN_EXTENSIONS | {'.py'}
+
+# Markdown smaller than this is split by a line scanner instead of Tree-sitter
+FAST_PARSE_MAX_CHARS = 4096
+# Line starts the line scanner leaves to Tree-sitter (lists, quotes, HTML, tables, rules...)
+_COMPLEX_LINE_PREFIXES = ('>', '-', '*', '+', '_', '=', '|', '<', '[', '~', '\\')
+
+# Bump when chunking output changes so stale parse-cache entries are ignored
+PARSE_CACHE_VERSION = 5
+
+def _chunk_id(text: str, metadata: Dict[str, Any]) -> str:
+    """Derive a stable chunk id from its text and source file."""
+    return hashlib.blake2b((text + metadata['source']).encode('utf-8'), digest_size=16).hexdigest()
+
+def _dedupe_ids(chunks: List[Dict[str, Any]], seen: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    """Suffix repeated chunk ids with an occurrence number, keeping ids deterministic.
+
+    Pass the same ``seen`` set across calls to keep ids unique over several files.
+    """
+    seen = set() if seen is None else seen
+    for chunk in chunks:
+        chunk_id = base_id = chunk['id']
+        occurrence = 0
+        while chunk_id in seen:
+            occurrence += 1
+            chunk_id = f"{base_id}-{occurrence}"
+        seen.add(chunk_id)
+        chunk['id'] = chunk_id
+    return chunks
+
+def _child_of_type(node: Any, node_type: str) -> Any:
+    """Return the first child of a Tree-sitter node with the given type, or None."""
+    for child in node.children:
+        if child.type == node_type:
+            return child
+    return None
+
+def _scan_simple_markdown(content: str, filename: str, title: str) -> Optional[List[Dict[str, Any]]]:
+    """Split plain markdown (ATX headings, fences, paragraphs) into sections in one pass.
+
+    Produces the same sections as the Tree-sitter path. Returns None as soon as it meets
+    anything else (lists, quotes, HTML, indentation, non-ASCII...) so the caller can
+    fall back to the full parser.
+    """
+    if not content.isascii() or '\r' in content or '\t' in content:
+        return None
+    
+    sections = []
+    current_heading = title
+    paragraph: List[str] = []
+    
+    def flush_paragraph() -> None:
+        if paragraph:
+            sections.append({
+                'text': '\n'.join(paragraph),
+                'metadata': {'title': current_heading, 'source': filename, 'chunk_type': 'text'}
+            })
+            paragraph.clear()
+    
+    lines = content.split('\n')
+    line_no = 0
+    while line_no < len(lines):
+        line = lines[line_no]
+        line_no += 1
+        
+        if not line:
+            flush_paragraph()
+            continue
+        if line != line.strip() or line.startswith(_COMPLEX_LINE_PREFIXES) or line[0].isdigit():
+            return None
+        
+        if line.startswith('#'):
+            marker, _, heading = line.partition(' ')
+            if len(marker) > 6 or marker.strip('#') or not heading or heading.endswith('#'):
+                return None
+            flush_paragraph()
+            current_heading = heading.strip()
+        
+        elif line.startswith('```'):
+            info_string = line[3:]
+            if '`' in info_string or ' ' in info_string:
+                return None
+            flush_paragraph()
+            
+            # Collect code up to a closing fence; unterminated or unusual fences need the parser
+            code_lines = []
+            while line_no < len(lines):
+                code_line = lines[line_no]
+                if code_line.lstrip().startswith('```'):
+                    if code_line.strip('`'):
+                        return None
+                    break
+                code_lines.append(code_line)
+                line_no += 1
+            else:
+                return None
+            line_no += 1
+            
+            code_text = '\n'.join(code_lines)
+            if code_text.strip():
+                sections.append({
+                    'text': code_text,
+                    'metadata': {'title': current_heading, 'source': filename,
+                                 'chunk_type': 'code', 'language': info_string}
+                })
+        
+        else:
+            paragraph.append(line)
+    
+    flush_paragraph()
+    return sections
+
+# Per-process document processor, created once by _init_worker in each pool worker
+_worker_processor = None
+
+
+def _init_worker(chunk_size: int, overlap: int, cache_dir: Optional[str], cache_ttl_hours: float) -> None:
+    """Build the worker's processor so Tree-sitter parsers are created once per process."""
+    global _worker_processor
+    _worker_processor = DocumentProcessor(chunk_size=chunk_size, overlap=overlap,
+                                          cache_dir=cache_dir, cache_ttl_hours=cache_ttl_hours)
+
+
+def _process_file_worker(filepath: str) -> List[Dict[str, Any]]:
+    """Process one file in a pool worker."""
+    return _worker_processor.process_file(filepath)
+
 
 class DocumentProcessor:
-    def __init__(self, chunk_size: int = CHUNK_SIZE, overlap: int = OVERLAP_SIZE):
-        """Initialize document processor with Tree-sitter parsers and chunking parameters."""
+    def __init__(self, chunk_size: int = settings.chunk_size, overlap: int = settings.overlap_size,
+                 cache_dir: Optional[str] = settings.parse_cache_dir,
+                 cache_ttl_hours: float = settings.parse_cache_ttl_hours):
+        """Initialize document processor with Tree-sitter parsers and chunking parameters.
+
+        Chunk lists are cached under ``cache_dir`` keyed by file content; pass ``None``
+        to disable caching. Entries older than ``cache_ttl_hours`` (0 = never) are ignored.
+        """
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.cache_dir = cache_dir
+        self.cache_ttl_hours = cache_ttl_hours
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
         
         # Initialize parsers for markdown and Python
         try:
@@ -31,41 +187,61 @@ class DocumentProcessor:
             logger.error(f"Error initializing parsers: {e}")
             raise
     
-    def process_directory(self, directory: str, output_file: Optional[str] = DEFAULT_CHUNKS_PATH) -> List[Dict[str, Any]]:
-        """Process all documentation files in a directory and save chunks."""
-        # Find all markdown and Python files
-        file_patterns = ['**/*.md', '**/*.markdown', '**/*.py']
+    def iter_directory(self, directory: str, max_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield chunks for all documentation files in a directory, file by file."""
+        # Find all markdown and Python files in one walk, skipping hidden entries like glob does
         all_files = []
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for name in sorted(files):
+                if not name.startswith('.') and os.path.splitext(name)[1] in DOC_EXTENSIONS:
+                    all_files.append(os.path.join(root, name))
+        
+        logger.info("Found files to process", count=len(all_files))
+        
+        # Files with the same name and content in different directories yield the same ids
+        seen_ids: Set[str] = set()
+        
+        # Process each file, fanning out to worker processes for larger corpora
+        if len(all_files) < MIN_PARALLEL_FILES or max_workers == 1:
+            for filepath in all_files:
+                try:
+                    chunks = self.process_file(filepath)
+                    logger.debug("Processed %s: %d chunks", filepath, len(chunks))
+                    yield from _dedupe_ids(chunks, seen_ids)
+                except Exception as e:
+                    logger.error("Error processing file %s: %s", filepath, e)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                     initializer=_init_worker,
+                                     initargs=(self.chunk_size, self.overlap,
+                                               self.cache_dir, self.cache_ttl_hours)) as executor:
+                for filepath, chunks in zip(all_files, executor.map(_process_file_worker, all_files, chunksize=8)):
+                    logger.debug("Processed %s: %d chunks", filepath, len(chunks))
+                    yield from _dedupe_ids(chunks, seen_ids)
+    
+    def process_directory(self, directory: str, output_file: Optional[str] = settings.default_chunks_path,
+                          max_workers: Optional[int] = None) -> int:
+        """Process all documentation files in a directory, stream chunks to a file and return the count.
+
+        The output is compact JSON, or JSON Lines when ``output_file`` ends in ``.jsonl``.
+        """
+        chunks = self.iter_directory(directory, max_workers)
+        count = 0
         
-        for pattern in file_patterns:
-            matched_files = glob.glob(os.path.join(directory, pattern), recursive=True)
-            all_files.extend(matched_files)
-        
-        logger.info(f"Found {len(all_files)} files to process")
-        print(f"Found {len(all_files)} files to process")
-        
-        # Process each file
-        all_chunks = []
-        for filepath in all_files:
-            try:
-                chunks = self.process_file(filepath)
-                all_chunks.extend(chunks)
-                logger.debug(f"Processed {filepath}: {len(chunks)} chunks")
-            except Exception as e:
-                logger.error(f"Error processing file {filepath}: {e}")
-        
-        logger.info(f"Generated {len(all_chunks)} chunks from {len(all_files)} files")
-        print(f"Generated {len(all_chunks)} chunks from {len(all_files)} files")
-        
-        # Save chunks if output file is specified
         if output_file:
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(all_chunks, f, indent=2)
-            logger.info(f"Saved chunks to {output_file}")
-            print(f"Saved chunks to {output_file}")
+            os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+            with ChunkWriter(output_file) as writer:
+                for chunk in chunks:
+                    writer.write((chunk,))
+                    count += 1
+            logger.info("Saved chunks", path=output_file)
+        else:
+            for _ in chunks:
+                count += 1
         
-        return all_chunks
+        logger.info("Generated chunks", chunks=count)
+        return count
     
     def process_file(self, filepath: str) -> List[Dict[str, Any]]:
         """Process a single file into chunks with metadata."""
@@ -75,8 +251,15 @@ class DocumentProcessor:
             
             filename = os.path.basename(filepath)
             
+            # Reuse chunks from a previous run over identical content
+            cache_path = self._get_cache_path(filepath, content) if self.cache_dir else None
+            if cache_path:
+                cached_chunks = self._get_from_cache(cache_path)
+                if cached_chunks is not None:
+                    return cached_chunks
+            
             # Process markdown files
-            if filepath.endswith(('.md', '.markdown')):
+            if os.path.splitext(filepath)[1] in MARKDOWN_EXTENSIONS:
                 sections = self._parse_markdown(content, filename)
             else:
                 # For non-markdown files, treat as code
@@ -92,23 +275,70 @@ class DocumentProcessor:
                 }]
             
             # Chunk sections
-            chunks = self._chunk_sections(sections)
+            chunks = _dedupe_ids(self._chunk_sections(sections))
+            if cache_path:
+                self._save_to_cache(cache_path, chunks)
             return chunks
             
         except Exception as e:
             logger.error(f"Error processing file {filepath}: {e}")
             return []
     
+    def _get_cache_path(self, filepath: str, content: str) -> str:
+        """Build the cache path for a file from its name, content and chunking parameters."""
+        key = hashlib.sha256(
+            f"{PARSE_CACHE_VERSION}:{self.chunk_size}:{self.overlap}:{os.path.basename(filepath)}\0".encode('utf-8')
+            + content.encode('utf-8')
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def _get_from_cache(self, cache_path: str) -> Optional[List[Dict[str, Any]]]:
+        """Load cached chunks; None on miss or expiry."""
+        try:
+            if self.cache_ttl_hours > 0:
+                age_hours = (time.time() - os.stat(cache_path).st_mtime) / 3600
+                if age_hours > self.cache_ttl_hours:
+                    return None
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                chunks = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading parse cache {cache_path}: {e}")
+            return None
+        return chunks
+    
+    def _save_to_cache(self, cache_path: str, chunks: List[Dict[str, Any]]) -> None:
+        """Write chunks to the cache atomically so concurrent workers never see partial files."""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(chunks, f)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                # Don't leave orphaned temp files behind on failure
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            logger.error(f"Error writing parse cache {cache_path}: {e}")
+    
     def _extract_title(self, content: str) -> str:
         """Extract title from markdown content."""
         # Look for the first heading
-        match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
+        match = _TITLE_RE.search(content)
         if match:
             return match.group(1).strip()
         return "Untitled Document"
     
     def _parse_markdown(self, content: str, filename: str) -> List[Dict[str, Any]]:
         """Parse markdown content into sections."""
+        # Small, plain documents don't need the structural parser
+        if len(content) < FAST_PARSE_MAX_CHARS:
+            sections = _scan_simple_markdown(content, filename, self._extract_title(content))
+            if sections is not None:
+                return sections
+        
         sections = []
         tree = self.markdown_parser.parse(bytes(content, 'utf8'))
         root_node = tree.root_node
@@ -119,18 +349,18 @@ class DocumentProcessor:
         
         # Process each node
         for child in root_node.children:
-            # Check if it's a heading
-            if child.type == 'atx_heading':
-                heading_text_node = child.child_by_field_name('heading_content')
+            # Check if it's a heading; this grammar exposes parts as child nodes, not fields
+            if child.type in ('atx_heading', 'setext_heading'):
+                heading_text_node = _child_of_type(child, 'heading_content')
                 if heading_text_node:
                     heading_text = content[heading_text_node.start_byte:heading_text_node.end_byte]
-                    current_heading = heading_text
+                    current_heading = heading_text.strip()
             
             # Check if it's a code block
             elif child.type == 'fenced_code_block':
                 # Extract language info
                 info_string = ''
-                info_node = child.child_by_field_name('info_string')
+                info_node = _child_of_type(child, 'info_string')
                 if info_node:
                     info_string = content[info_node.start_byte:info_node.end_byte]
                 
@@ -153,7 +383,7 @@ class DocumentProcessor:
                     })
             
             # Check if it's a paragraph or other text content
-            elif child.type in ('paragraph', 'block_quote', 'list'):
+            elif child.type in ('paragraph', 'block_quote', 'tight_list', 'loose_list'):
                 text = content[child.start_byte:child.end_byte]
                 if text.strip():
                     sections.append({
@@ -180,7 +410,7 @@ class DocumentProcessor:
                 # If small enough, keep as one chunk
                 if len(text) <= self.chunk_size * 1.5:
                     all_chunks.append({
-                        'id': str(uuid.uuid4()),
+                        'id': _chunk_id(text, metadata),
                         'text': text,
                         'metadata': metadata
                     })
@@ -198,52 +428,18 @@ class DocumentProcessor:
     def _find_code_chunk_points(self, code: str) -> List[int]:
         """Find good splitting points in code (class/function definitions)."""
         chunk_points = []
-        
-        # Simple patterns to detect Python structures
-        patterns = [
-            r'^\s*def\s+\w+\s*\(',  # Function definitions
-            r'^\s*class\s+\w+\s*[:\(]',  # Class definitions
-            r'^\s*if\s+__name__\s*==\s*[\'"]__main__[\'"]\s*:',  # Main block
-            r'^\s*@\w+',  # Decorators
-            r'^\s*#\s*\w+',  # Section comments
-        ]
-        
-        # Find line start positions
-        line_start_positions = [0]
-        for i, char in enumerate(code):
-            if char == '\n':
-                line_start_positions.append(i + 1)
-        
-        # Check each line against patterns
-        for i, line_start in enumerate(line_start_positions):
-            line_end = code.find('\n', line_start)
-            if line_end == -1:
-                line_end = len(code)
-            
-            line = code[line_start:line_end]
-            
-            # Check line against all patterns
-            for pattern in patterns:
-                if re.match(pattern, line):
-                    chunk_points.append(line_start)
-                    break
-        
-        # Remove points that are too close together (at least 5 lines apart)
-        if chunk_points:
-            filtered_points = [chunk_points[0]]
-            
-            for point in chunk_points[1:]:
-                prev_point = filtered_points[-1]
-                
-                # Convert to line numbers for distance check
-                prev_line = line_start_positions.index(prev_point)
-                current_line = line_start_positions.index(point)
-                
-                # Ensure points are at least 5 lines apart
-                if current_line - prev_line >= 5:
-                    filtered_points.append(point)
-            
-            return filtered_points
+        last_line = None
+        offset = 0
+        
+        # Single pass over lines, matching Python structures by prefix
+        for line_no, line in enumerate(code.splitlines(keepends=True)):
+            stripped = line.lstrip()
+            if stripped.startswith(CODE_CHUNK_PREFIXES):
+                # Keep points at least 5 lines apart
+                if last_line is None or line_no - last_line >= 5:
+                    chunk_points.append(offset)
+                    last_line = line_no
+            offset += len(line)
         
         return chunk_points
     
@@ -263,9 +459,10 @@ class DocumentProcessor:
                 # Ensure minimum chunk size
                 if point - start_idx >= self.chunk_size / 2:
                     chunks.append({
-                        'id': str(uuid.uuid4()),
+                        'id': _chunk_id(code[start_idx:point], metadata),
                         'text': code[start_idx:point],
-                        'metadata': {**metadata, 'chunk': chunk_num}
+                        'metadata': metadata,
+                        'chunk': chunk_num
                     })
                     start_idx = max(0, point - self.overlap)
                     chunk_num += 1
@@ -273,9 +470,10 @@ class DocumentProcessor:
             # Add the final chunk
             if start_idx < len(code):
                 chunks.append({
-                    'id': str(uuid.uuid4()),
+                    'id': _chunk_id(code[start_idx:], metadata),
                     'text': code[start_idx:],
-                    'metadata': {**metadata, 'chunk': chunk_num}
+                    'metadata': metadata,
+                    'chunk': chunk_num
                 })
         else:
             # Fall back to character-based chunking
@@ -288,7 +486,7 @@ class DocumentProcessor:
         chunks = []
         
         # Split text into paragraphs
-        paragraphs = re.split(r'\n\s*\n', text)
+        paragraphs = _PARA_SPLIT_RE.split(text)
         
         current_chunk = ""
         chunk_num = 1
@@ -299,9 +497,10 @@ class DocumentProcessor:
                 # If we have content to save
                 if current_chunk:
                     chunks.append({
-                        'id': str(uuid.uuid4()),
+                        'id': _chunk_id(current_chunk.strip(), metadata),
                         'text': current_chunk.strip(),
-                        'metadata': {**metadata, 'chunk': chunk_num}
+                        'metadata': metadata,
+                        'chunk': chunk_num
                     })
                     chunk_num += 1
                 
@@ -319,9 +518,10 @@ class DocumentProcessor:
         # Don't forget the last chunk
         if current_chunk.strip():
             chunks.append({
-                'id': str(uuid.uuid4()),
+                'id': _chunk_id(current_chunk.strip(), metadata),
                 'text': current_chunk.strip(),
-                'metadata': {**metadata, 'chunk': chunk_num}
+                'metadata': metadata,
+                'chunk': chunk_num
             })
         
         return chunks
@@ -329,7 +529,7 @@ class DocumentProcessor:
     def _split_large_paragraph(self, para: str, metadata: Dict[str, Any], start_chunk_num: int) -> List[Dict[str, Any]]:
         """Split a large paragraph into sentence-based chunks."""
         chunks = []
-        sentences = re.split(r'(?<=[.!?])\s+', para)
+        sentences = _SENT_SPLIT_RE.split(para)
         
         current_chunk = ""
         chunk_num = start_chunk_num
@@ -338,9 +538,10 @@ class DocumentProcessor:
             if len(current_chunk) + len(sentence) > self.chunk_size:
                 if current_chunk:
                     chunks.append({
-                        'id': str(uuid.uuid4()),
+                        'id': _chunk_id(current_chunk.strip(), metadata),
                         'text': current_chunk.strip(),
-                        'metadata': {**metadata, 'chunk': chunk_num}
+                        'metadata': metadata,
+                        'chunk': chunk_num
                     })
                     chunk_num += 1
                     current_chunk = sentence + " "
@@ -353,9 +554,10 @@ class DocumentProcessor:
         # Add the last chunk if needed
         if current_chunk.strip():
             chunks.append({
-                'id': str(uuid.uuid4()),
+                'id': _chunk_id(current_chunk.strip(), metadata),
                 'text': current_chunk.strip(),
-                'metadata': {**metadata, 'chunk': chunk_num}
+                'metadata': metadata,
+                'chunk': chunk_num
             })
         
         return chunks
@@ -383,9 +585,10 @@ class DocumentProcessor:
                         end = space
             
             chunks.append({
-                'id': str(uuid.uuid4()),
+                'id': _chunk_id(text[start:end].strip(), metadata),
                 'text': text[start:end].strip(),
-                'metadata': {**metadata, 'chunk': chunk_num}
+                'metadata': metadata,
+                'chunk': chunk_num
             })
             
             # Move to next chunk with overlap
@@ -6,25 +6,21 @@ Handles generating embeddings with OpenAI API and basic caching.
 import os
 import json
 import hashlib
+import tempfile
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 
 from openai import OpenAI
 
-from ptsearch.config import (
-    OPENAI_API_KEY, 
-    EMBEDDING_MODEL, 
-    EMBEDDING_DIMENSIONS,
-    CACHE_DIR,
-    MAX_CACHE_SIZE_GB,
-    DEFAULT_CHUNKS_PATH,
-    DEFAULT_EMBEDDINGS_PATH,
-    logger
-)
+from ptsearch.config import settings
+from ptsearch.utils import logger
+
+# Shared, immutable fallback for empty texts and failed requests
+_ZERO_EMBEDDING = (0.0,) * settings.embedding_dimensions
 
 class EmbeddingGenerator:
-    def __init__(self, api_key: str = OPENAI_API_KEY, model: str = EMBEDDING_MODEL, 
-                 use_cache: bool = True, cache_dir: str = CACHE_DIR):
+    def __init__(self, api_key: str = settings.openai_api_key, model: str = settings.embedding_model, 
+                 use_cache: bool = True, cache_dir: str = settings.cache_dir):
         """Initialize embedding generator with OpenAI API and basic caching."""
         self.model = model
         self.api_key = api_key
@@ -63,7 +59,7 @@ class EmbeddingGenerator:
                 logger.error(f"Unexpected error initializing OpenAI client: {e}")
                 raise
     
-    def generate_embedding(self, text: str) -> List[float]:
+    def generate_embedding(self, text: str) -> Sequence[float]:
         """Generate embedding for a single text with caching."""
         if self.use_cache:
             # Check cache first
@@ -90,16 +86,16 @@ class EmbeddingGenerator:
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             # Return zeros as fallback
-            return [0.0] * EMBEDDING_DIMENSIONS
+            return _ZERO_EMBEDDING
     
-    def generate_embeddings(self, texts: List[str], batch_size: int = 20) -> List[List[float]]:
+    def generate_embeddings(self, texts: List[str], batch_size: int = 20) -> List[Sequence[float]]:
         """Generate embeddings for multiple texts with batching."""
         all_embeddings = []
         
         # Process in batches
         for i in range(0, len(texts), batch_size):
             batch_texts = texts[i:i+batch_size]
-            batch_embeddings = []
+            batch_embeddings = [None] * len(batch_texts)
             
             # Check cache first
             uncached_texts = []
@@ -110,7 +106,7 @@ class EmbeddingGenerator:
                     cached_embedding = self._get_from_cache(text)
                     if cached_embedding:
                         self.stats["hits"] += 1
-                        batch_embeddings.append(cached_embedding)
+                        batch_embeddings[j] = cached_embedding
                     else:
                         self.stats["misses"] += 1
                         uncached_texts.append(text)
@@ -137,24 +133,15 @@ class EmbeddingGenerator:
                     
                     # Place embeddings in correct order
                     for idx, embedding in zip(uncached_indices, api_embeddings):
-                        while len(batch_embeddings) <= idx:
-                            batch_embeddings.append(None)
                         batch_embeddings[idx] = embedding
                     
                 except Exception as e:
                     logger.error(f"Error generating batch embeddings: {e}")
                     # Use zeros as fallback
                     for idx in uncached_indices:
-                        while len(batch_embeddings) <= idx:
-                            batch_embeddings.append(None)
-                        batch_embeddings[idx] = [0.0] * EMBEDDING_DIMENSIONS
-            
-            # Ensure all positions have embeddings
-            for j in range(len(batch_texts)):
-                if j >= len(batch_embeddings) or batch_embeddings[j] is None:
-                    batch_embeddings.append([0.0] * EMBEDDING_DIMENSIONS)
+                        batch_embeddings[idx] = _ZERO_EMBEDDING
             
-            all_embeddings.extend(batch_embeddings[:len(batch_texts)])
+            all_embeddings.extend(batch_embeddings)
             
             # Respect API rate limits
             if i + batch_size < len(texts):
@@ -167,8 +154,7 @@ class EmbeddingGenerator:
         # Extract texts from chunks
         texts = [chunk["text"] for chunk in chunks]
         
-        logger.info(f"Generating embeddings for {len(texts)} chunks using model {self.model}")
-        print(f"Generating embeddings for {len(texts)} chunks using model {self.model}")
+        logger.info("Generating embeddings for chunks", count=len(texts), model=self.model)
         
         # Generate embeddings
         embeddings = self.generate_embeddings(texts, batch_size)
@@ -180,22 +166,19 @@ class EmbeddingGenerator:
         # Log cache stats
         if self.use_cache:
             hit_rate = self.stats["hits"] / (self.stats["hits"] + self.stats["misses"]) if (self.stats["hits"] + self.stats["misses"]) > 0 else 0
-            logger.info(f"Cache hit rate: {hit_rate:.2%}")
-            print(f"Cache hit rate: {hit_rate:.2%}")
+            logger.info("Embedding cache statistics", hit_rate=f"{hit_rate:.2%}")
         
         return chunks
     
     def process_file(self, input_file: str, output_file: Optional[str] = None) -> List[Dict[str, Any]]:
         """Process a file containing chunks and add embeddings."""
-        logger.info(f"Loading chunks from {input_file}")
-        print(f"Loading chunks from {input_file}")
+        logger.info("Loading chunks from file", path=input_file)
         
         # Load chunks
         with open(input_file, 'r', encoding='utf-8') as f:
             chunks = json.load(f)
         
-        logger.info(f"Loaded {len(chunks)} chunks")
-        print(f"Loaded {len(chunks)} chunks")
+        logger.info("Loaded chunks from file", count=len(chunks))
         
         # Generate embeddings
         chunks_with_embeddings = self.embed_chunks(chunks)
@@ -204,8 +187,7 @@ class EmbeddingGenerator:
         if output_file:
             with open(output_file, 'w', encoding='utf-8') as f:
                 json.dump(chunks_with_embeddings, f)
-            logger.info(f"Saved {len(chunks_with_embeddings)} chunks with embeddings to {output_file}")
-            print(f"Saved {len(chunks_with_embeddings)} chunks with embeddings to {output_file}")
+            logger.info("Saved chunks with embeddings to file", count=len(chunks_with_embeddings), path=output_file)
         
         return chunks_with_embeddings
     
@@ -233,13 +215,20 @@ class EmbeddingGenerator:
         cache_path = self._get_cache_path(text)
         
         try:
-            with open(cache_path, 'w') as f:
-                json.dump({
-                    "text_preview": text[:100] + "..." if len(text) > 100 else text,
-                    "model": self.model,
-                    "embedding": embedding,
-                    "timestamp": time.time()
-                }, f)
+            # Write to a temp file and rename so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({
+                        "text_preview": text[:100] + "..." if len(text) > 100 else text,
+                        "model": self.model,
+                        "embedding": embedding,
+                        "timestamp": time.time()
+                    }, f)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
             
             # Manage cache size (simple LRU)
             self._manage_cache_size()
@@ -248,7 +237,7 @@ class EmbeddingGenerator:
     
     def _manage_cache_size(self) -> None:
         """Manage cache size using LRU strategy."""
-        max_size_bytes = int(MAX_CACHE_SIZE_GB * 1024 * 1024 * 1024)
+        max_size_bytes = int(settings.max_cache_size_gb * 1024 * 1024 * 1024)
         
         # Get all cache files with their info
         cache_files = []
@@ -5,7 +5,7 @@ Formats and ranks search results.
 
 from typing import List, Dict, Any
 
-from ptsearch.config import logger
+from ptsearch.utils import logger
 
 class ResultFormatter:
     """Formats and ranks search results."""
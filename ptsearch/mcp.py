@@ -15,10 +15,11 @@ from flask_cors import CORS
 from ptsearch.database import DatabaseManager
 from ptsearch.embedding import EmbeddingGenerator
 from ptsearch.search import SearchEngine
-from ptsearch.config import MAX_RESULTS, OPENAI_API_KEY, logger
+from ptsearch.config import settings
+from ptsearch.utils import logger
 
 # Early API key validation
-if not OPENAI_API_KEY:
+if not settings.openai_api_key:
     logger.error("OPENAI_API_KEY not found. Please set this key before running the server.")
     print("Error: OPENAI_API_KEY not found in environment variables.")
     print("Please set this key in your .env file or environment before running the server.")
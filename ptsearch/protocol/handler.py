@@ -6,6 +6,11 @@ Processes MCP messages and dispatches to appropriate handlers.
 import json
 from typing import Dict, Any, Optional, Callable, List, Union
 
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
 from ptsearch.utils import logger
 from ptsearch.utils.error import ProtocolError, format_error
 from ptsearch.protocol.descriptor import get_tool_descriptor
@@ -13,47 +18,107 @@ from ptsearch.protocol.descriptor import get_tool_descriptor
 # Define handler type for protocol methods
 HandlerType = Callable[[Dict[str, Any]], Dict[str, Any]]
 
+# Reply to messages that parse as JSON but aren't request objects
+INVALID_REQUEST = ProtocolError("Invalid Request", -32600)
+
+
+def _loads(message: Union[str, bytes]) -> Any:
+    """Parse a JSON message; orjson.JSONDecodeError subclasses json.JSONDecodeError."""
+    if orjson is not None:
+        return orjson.loads(message)
+    return json.loads(message)
+
+
+def _dumps(response: Any) -> str:
+    """Serialize a JSON-RPC response, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(response).decode("utf-8")
+    return json.dumps(response)
+
+
 class MCPProtocolHandler:
     """Handler for MCP protocol messages."""
     
-    def __init__(self, search_handler: HandlerType):
-        """Initialize with search handler function."""
+    def __init__(self, search_handler: HandlerType, clear_cache: Optional[Callable[[], None]] = None):
+        """Initialize with search handler function and an optional result-cache invalidator."""
         self.search_handler = search_handler
+        self.clear_cache = clear_cache
         self.tool_descriptor = get_tool_descriptor()
+        self.tool_name = self.tool_descriptor["name"]
         self.handlers: Dict[str, HandlerType] = {
             "initialize": self._handle_initialize,
             "list_tools": self._handle_list_tools,
             "call_tool": self._handle_call_tool
         }
+        if clear_cache is not None:
+            # Lets operators drop cached results after re-indexing without restarting the server
+            self.handlers["clear_cache"] = self._handle_clear_cache
+        
+        # Results that never change between requests, serialized once; only the id varies
+        self._static_results: Dict[str, str] = {
+            "initialize": _dumps(self._handle_initialize({})),
+            "list_tools": _dumps(self._handle_list_tools({}))
+        }
+        # Parse errors can't echo an id, so the whole response is constant
+        self._parse_error_response = _dumps(self._format_error(None, ProtocolError("Invalid JSON", -32700)))
+        self._invalid_request_response = _dumps(self._format_error(None, INVALID_REQUEST))
     
-    def process_message(self, message: str) -> str:
-        """Process an MCP message and return the response."""
+    def process_message(self, message: Union[str, bytes]) -> str:
+        """Process an MCP message, as text or UTF-8 bytes, and return the response."""
         try:
             # Parse the message
-            data = json.loads(message)
-            
-            # Get the method and message ID
-            method = data.get("method", "")
-            message_id = data.get("id")
-            
-            # Log the received message
-            logger.info(f"Received MCP message", method=method, id=message_id)
-            
-            # Handle the message
-            if method in self.handlers:
-                result = self.handlers[method](data)
-                return self._format_response(message_id, result)
-            else:
-                error = ProtocolError(f"Unknown method: {method}", -32601)
-                return self._format_error(message_id, error)
-                
+            data = _loads(message)
         except json.JSONDecodeError:
             logger.error("Invalid JSON message")
-            error = ProtocolError("Invalid JSON", -32700)
-            return self._format_error(None, error)
+            return self._parse_error_response
+        
+        if not isinstance(data, dict):
+            logger.error("MCP message is not a JSON object")
+            return self._invalid_request_response
+        
+        message_id = self._log_message(data)
+        
+        # Constant results were serialized at construction; only the id varies.
+        # Non-string methods fall through so dispatch reports them as errors
+        method = data.get("method", "")
+        static_result = self._static_results.get(method) if isinstance(method, str) else None
+        if static_result is not None:
+            return self._format_raw_response(message_id, static_result)
+        
+        response = self._dispatch_dict(data)
+        try:
+            return _dumps(response)
+        except Exception as e:
+            logger.exception(f"Error serializing response: {e}")
+            return _dumps(self._format_error(message_id, e))
+    
+    def process_dict(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Process an already parsed MCP message and return the response unserialized."""
+        if not isinstance(message, dict):
+            logger.error("MCP message is not a JSON object")
+            return self._format_error(None, INVALID_REQUEST)
+        self._log_message(message)
+        return self._dispatch_dict(message)
+    
+    def _log_message(self, data: Dict[str, Any]) -> Any:
+        """Log a received message and return its ID."""
+        message_id = data.get("id")
+        logger.info(f"Received MCP message", method=data.get("method", ""), id=message_id)
+        return message_id
+    
+    def _dispatch_dict(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the handler for a parsed message and build the response."""
+        method = data.get("method", "")
+        message_id = data.get("id")
+        try:
+            handler = self.handlers.get(method) if isinstance(method, str) else None
+            if handler is None:
+                error = ProtocolError(f"Unknown method: {method}", -32601)
+                return self._format_error(message_id, error)
+            return self._format_response(message_id, handler(data))
         except Exception as e:
             logger.exception(f"Error processing message: {e}")
-            return self._format_error(data.get("id") if 'data' in locals() else None, e)
+            return self._format_error(message_id, e)
     
     def _handle_initialize(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Handle initialize request."""
@@ -69,23 +134,33 @@ class MCPProtocolHandler:
         tool_name = params.get("tool")
         args = params.get("args", {})
         
-        if tool_name != self.tool_descriptor["name"]:
+        if tool_name != self.tool_name:
             raise ProtocolError(f"Unknown tool: {tool_name}", -32602)
         
         # Execute search through handler
         result = self.search_handler(args)
         return {"result": result}
     
-    def _format_response(self, id: Optional[str], result: Dict[str, Any]) -> str:
+    def _handle_clear_cache(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle clear_cache request."""
+        self.clear_cache()
+        logger.info("Cleared search result cache")
+        return {"cleared": True}
+    
+    def _format_response(self, id: Optional[str], result: Dict[str, Any]) -> Dict[str, Any]:
         """Format a successful response."""
         response = {
             "jsonrpc": "2.0",
             "id": id,
             "result": result
         }
-        return json.dumps(response)
+        return response
+    
+    def _format_raw_response(self, id: Optional[str], result: str) -> str:
+        """Format a successful response whose result is already serialized."""
+        return '{"jsonrpc":"2.0","id":' + _dumps(id) + ',"result":' + result + '}'
     
-    def _format_error(self, id: Optional[str], error: Union[ProtocolError, Exception]) -> str:
+    def _format_error(self, id: Optional[str], error: Union[ProtocolError, Exception]) -> Dict[str, Any]:
         """Format an error response."""
         error_dict = format_error(error)
         
@@ -101,4 +176,4 @@ class MCPProtocolHandler:
         if "details" in error_dict:
             response["error"]["data"] = error_dict["details"]
             
-        return json.dumps(response)
\ No newline at end of file
+        return response
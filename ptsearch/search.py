@@ -3,14 +3,26 @@ Search module for PyTorch Documentation Search Tool.
 Combines embedding generation, database querying, and result formatting.
 """
 
+import asyncio
 from typing import List, Dict, Any, Optional
 import re
 
-from ptsearch.config import MAX_RESULTS, logger
+from ptsearch.config import settings
+from ptsearch.utils import logger
 from ptsearch.formatter import ResultFormatter
 from ptsearch.database import DatabaseManager
 from ptsearch.embedding import EmbeddingGenerator
 
+# Keywords suggesting the user wants code, matched case-insensitively
+_CODE_INDICATORS = frozenset([
+    "code", "example", "implementation", "function", "class", "method",
+    "snippet", "syntax", "parameter", "argument", "return", "import",
+    "module", "api", "call", "invoke", "instantiate", "create", "initialize"
+])
+
+# Code syntax fragments, matched case-sensitively in one compiled pass
+_CODE_PATTERN = re.compile(r"def |class |import |from |torch\.|nn\.|->|=>|==|!=|\+=|-=|\*=|\(\):|@")
+
 class SearchEngine:
     """Main search engine that combines all components."""
     
@@ -24,7 +36,7 @@ class SearchEngine:
         
         logger.info("Search engine initialized")
     
-    def search(self, query: str, num_results: int = MAX_RESULTS, 
+    def search(self, query: str, num_results: int = settings.max_results, 
                filter_type: Optional[str] = None) -> Dict[str, Any]:
         """Search for documents matching the query."""
         try:
@@ -63,6 +75,11 @@ class SearchEngine:
                 "results": []
             }
     
+    async def asearch(self, query: str, num_results: int = settings.max_results,
+                      filter_type: Optional[str] = None) -> Dict[str, Any]:
+        """Run search in a worker thread so concurrent queries overlap their embedding and DB round trips."""
+        return await asyncio.to_thread(self.search, query, num_results, filter_type)
+    
     def _process_query(self, query: str) -> Dict[str, Any]:
         """Process query to determine intent and generate embedding."""
         # Clean query
@@ -83,27 +100,4 @@ class SearchEngine:
     def _is_code_query(self, query: str) -> bool:
         """Determine if a query is looking for code."""
         query_lower = query.lower()
-        
-        # Code indicator keywords
-        code_indicators = [
-            "code", "example", "implementation", "function", "class", "method",
-            "snippet", "syntax", "parameter", "argument", "return", "import",
-            "module", "api", "call", "invoke", "instantiate", "create", "initialize"
-        ]
-        
-        # Check for code indicators
-        for indicator in code_indicators:
-            if indicator in query_lower:
-                return True
-        
-        # Check for code patterns
-        code_patterns = [
-            "def ", "class ", "import ", "from ", "torch.", "nn.",
-            "->", "=>", "==", "!=", "+=", "-=", "*=", "():", "@"
-        ]
-        
-        for pattern in code_patterns:
-            if pattern in query:
-                return True
-        
-        return False
\ No newline at end of file
+        return any(indicator in query_lower for indicator in _CODE_INDICATORS) or bool(_CODE_PATTERN.search(query))
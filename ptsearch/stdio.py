@@ -4,24 +4,42 @@ STDIO transport handler for PyTorch Documentation Search Tool.
 Provides MCP-compatible server using STDIO transport.
 """
 
+import os
 import sys
 import json
+import asyncio
 import logging
+import threading
 from typing import Dict, Any, Optional, List
 
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
 from ptsearch.database import DatabaseManager
 from ptsearch.embedding import EmbeddingGenerator
+from ptsearch.utils.batching import BatchingEmbedder
 from ptsearch.search import SearchEngine
-from ptsearch.config import OPENAI_API_KEY, logger
+from ptsearch.config import settings
+from ptsearch.utils import logger
 from ptsearch.mcp import TOOL_DESCRIPTOR
 
 # Early API key validation
-if not OPENAI_API_KEY:
+if not settings.openai_api_key:
     logger.error("OPENAI_API_KEY not found. Please set this key before running the server.")
     print("Error: OPENAI_API_KEY not found in environment variables.", file=sys.stderr)
     print("Please set this key in your .env file or environment.", file=sys.stderr)
     sys.exit(1)
 
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a JSON value to UTF-8 bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
 class StdioMcpServer:
     """MCP server implementation using stdio transport."""
     
@@ -29,65 +47,99 @@ class StdioMcpServer:
         """Initialize MCP server with search components."""
         # Initialize components
         self.db_manager = DatabaseManager()
-        self.embedding_generator = EmbeddingGenerator()
+        # Concurrent call_tool requests share embedding API calls
+        self.embedding_generator = BatchingEmbedder(EmbeddingGenerator())
         self.search_engine = SearchEngine(self.db_manager, self.embedding_generator)
         
-        # Tool descriptor (using the same one from mcp.py)
-        self.tool_descriptor = TOOL_DESCRIPTOR.copy()
+        # Tool descriptor (using the same one from mcp.py), without the endpoint stdio doesn't need
+        self.tool_descriptor = {key: value for key, value in TOOL_DESCRIPTOR.items() if key != "endpoint"}
         
-        # Remove endpoint from tool descriptor as it's not needed for stdio
-        if "endpoint" in self.tool_descriptor:
-            del self.tool_descriptor["endpoint"]
+        # list_tools always returns the same result, so serialize it once
+        self._list_tools_result = _dumps({"tools": [self.tool_descriptor]})
+        
+        # MCP method name -> handler
+        self._dispatch = {
+            "initialize": self._handle_initialize,
+            "list_tools": self._handle_list_tools,
+            "call_tool": self._handle_call_tool,
+        }
+        
+        # Replies bypass the TextIOWrapper and go straight to the descriptor
+        self._stdout_fd = sys.stdout.fileno()
     
     def start(self):
         """Start the server processing loop."""
         print("PyTorch Documentation Search STDIO Server started", file=sys.stderr)
         
-        # Process messages in a loop
         try:
-            while True:
-                # Read a line from stdin
-                line = sys.stdin.readline()
-                if not line:
-                    break
-                
-                # Process the line
-                self._handle_message(line.strip())
+            asyncio.run(self._serve())
         except KeyboardInterrupt:
             print("Server shutting down", file=sys.stderr)
     
-    def _handle_message(self, message: str):
-        """Handle a single MCP message."""
+    async def _serve(self):
+        """Read messages until EOF, handling each as a task so searches run concurrently."""
+        pending = set()
+        lines: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+        # A daemon reader thread can't hold up interpreter exit the way an executor thread would
+        threading.Thread(target=self._read_stdin, args=(asyncio.get_running_loop(), lines),
+                         name="stdio-reader", daemon=True).start()
+        while True:
+            line = await lines.get()
+            if line is None:
+                break
+            
+            # Process the line; JSON-RPC ids let replies arrive out of order
+            task = asyncio.create_task(self._handle_message(line))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        
+        if pending:
+            await asyncio.gather(*pending)
+    
+    @staticmethod
+    def _read_stdin(loop: asyncio.AbstractEventLoop, lines: "asyncio.Queue[Optional[bytes]]") -> None:
+        """Feed raw stdin lines to the event loop, ending with None at EOF."""
+        # Unbuffered reads: a daemon thread parked holding the stdin buffer lock aborts interpreter exit
+        fd = sys.stdin.fileno()
+        partial = b""
+        while chunk := os.read(fd, 65536):
+            *complete, partial = (partial + chunk).split(b"\n")
+            for line in complete:
+                loop.call_soon_threadsafe(lines.put_nowait, line)
+        if partial:
+            loop.call_soon_threadsafe(lines.put_nowait, partial)
+        loop.call_soon_threadsafe(lines.put_nowait, None)
+    
+    async def _handle_message(self, message: bytes):
+        """Handle a single MCP message; surrounding whitespace is ignored by the parser."""
         try:
             # Parse the message
-            data = json.loads(message)
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError
+            data = orjson.loads(message) if orjson is not None else json.loads(message)
             method = data.get("method", "")
             
             # Dispatch to the appropriate handler
-            if method == "initialize":
-                self._handle_initialize(data)
-            elif method == "list_tools":
-                self._handle_list_tools(data)
-            elif method == "call_tool":
-                self._handle_call_tool(data)
-            else:
+            handler = self._dispatch.get(method)
+            if handler is None:
                 self._send_error(data.get("id"), f"Unknown method: {method}")
+                return
+            await handler(data)
         except json.JSONDecodeError:
-            logger.error(f"Invalid JSON: {message}")
+            logger.error(f"Invalid JSON: {message.decode('utf-8', 'replace').strip()}")
             self._send_error(None, "Invalid JSON")
         except Exception as e:
             logger.error(f"Error handling message: {e}")
             self._send_error(None, f"Internal error: {str(e)}")
     
-    def _handle_initialize(self, data: Dict[str, Any]):
+    async def _handle_initialize(self, data: Dict[str, Any]):
         """Handle initialize request."""
         self._send_response(data.get("id"), {"capabilities": ["tools"]})
     
-    def _handle_list_tools(self, data: Dict[str, Any]):
+    async def _handle_list_tools(self, data: Dict[str, Any]):
         """Handle list_tools request."""
-        self._send_response(data.get("id"), {"tools": [self.tool_descriptor]})
+        self._send_response_raw(data.get("id"), self._list_tools_result)
     
-    def _handle_call_tool(self, data: Dict[str, Any]):
+    async def _handle_call_tool(self, data: Dict[str, Any]):
         """Handle call_tool request."""
         params = data.get("params", {})
         tool_name = params.get("tool")
@@ -108,7 +160,7 @@ class StdioMcpServer:
         
         # Execute search
         try:
-            result = self.search_engine.search(query, n, filter_type)
+            result = await self.search_engine.asearch(query, n, filter_type)
             self._send_response(data.get("id"), {"result": result})
         except Exception as e:
             logger.error(f"Search error: {e}")
@@ -121,8 +173,7 @@ class StdioMcpServer:
             "id": id,
             "result": result
         }
-        sys.stdout.write(json.dumps(response) + "\n")
-        sys.stdout.flush()
+        self._write(response)
     
     def _send_error(self, id: Optional[str], message: str, code: int = -32000):
         """Send an error response."""
@@ -134,9 +185,22 @@ class StdioMcpServer:
                 "message": message
             }
         }
-        sys.stdout.write(json.dumps(response) + "\n")
-        sys.stdout.flush()
-
+        self._write(response)
+    
+    def _send_response_raw(self, id: Optional[str], result: bytes):
+        """Send a successful response whose result is already serialized."""
+        self._write_bytes(b'{"jsonrpc":"2.0","id":' + _dumps(id) + b',"result":' + result + b'}\n')
+    
+    def _write(self, response: Dict[str, Any]):
+        """Write one JSON-RPC message as a line of UTF-8 bytes."""
+        self._write_bytes(_dumps(response) + b"\n")
+    
+    def _write_bytes(self, payload: bytes):
+        """Write a complete payload to stdout with as few syscalls as possible."""
+        # Replies over PIPE_BUF may be written in pieces
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(self._stdout_fd, view):]
 
 def main():
     """Entry point for stdio server."""
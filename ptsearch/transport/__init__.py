@@ -3,7 +3,16 @@ Transport implementations for PyTorch Documentation Search Tool.
 """
 
 from ptsearch.transport.base import BaseTransport
-from ptsearch.transport.stdio import STDIOTransport
-from ptsearch.transport.sse import SSETransport
 
-__all__ = ["BaseTransport", "STDIOTransport", "SSETransport"]
\ No newline at end of file
+__all__ = ["BaseTransport", "STDIOTransport", "SSETransport"]
+
+
+def __getattr__(name):
+    """Import transports on first access so stdio servers never load Flask."""
+    if name == "STDIOTransport":
+        from ptsearch.transport.stdio import STDIOTransport
+        return STDIOTransport
+    if name == "SSETransport":
+        from ptsearch.transport.sse import SSETransport
+        return SSETransport
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -3,8 +3,10 @@ Server-Sent Events (SSE) transport implementation for PyTorch Documentation Sear
 Provides an HTTP server for MCP using Flask and SSE.
 """
 
+import gzip
 import json
 import time
+import zlib
 from typing import Dict, Any, Optional, Iterator
 
 from flask import Flask, Response, request, jsonify, stream_with_context, g
@@ -12,18 +14,26 @@ from flask_cors import CORS
 
 from ptsearch.utils import logger
 from ptsearch.utils.error import TransportError, format_error
-from ptsearch.protocol import MCPProtocolHandler, get_tool_descriptor
+from ptsearch.protocol import MCPProtocolHandler
 from ptsearch.transport.base import BaseTransport
 
+# Responses smaller than this aren't worth the gzip header overhead
+MIN_COMPRESS_BYTES = 512
+
 
 class SSETransport(BaseTransport):
     """SSE transport implementation for MCP."""
     
-    def __init__(self, protocol_handler: MCPProtocolHandler, host: str = "0.0.0.0", port: int = 5000):
-        """Initialize SSE transport with host and port."""
+    def __init__(self, protocol_handler: MCPProtocolHandler, host: str = "0.0.0.0", port: int = 5000,
+                 compression: Optional[str] = None):
+        """Initialize SSE transport with host, port and optional response compression."""
         super().__init__(protocol_handler)
+        if compression not in (None, "gzip"):
+            raise TransportError(f"Unsupported compression: {compression}")
         self.host = host
         self.port = port
+        self.compression = compression
+        self._tools_json = self._build_tools_json()
         self.flask_app = self._create_flask_app()
         self._running = False
     
@@ -38,20 +48,25 @@ class SSETransport(BaseTransport):
             g.request_id = logger.request_context()
             logger.info(f"{request.method} {request.path}")
         
+        # Compress JSON responses for clients that accept gzip
+        @app.after_request
+        def compress_response(response):
+            if (response.is_streamed or response.status_code != 200
+                    or "Content-Encoding" in response.headers or not self._accepts_gzip()):
+                return response
+            data = response.get_data()
+            if len(data) < MIN_COMPRESS_BYTES:
+                return response
+            response.set_data(gzip.compress(data, compresslevel=5))
+            response.headers["Content-Encoding"] = "gzip"
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+        
         # SSE events endpoint for tool registration
         @app.route("/events")
         def events():
             def stream() -> Iterator[str]:
-                tool_descriptor = get_tool_descriptor()
-                
-                # Add endpoint info for SSE transport
-                if "endpoint" not in tool_descriptor:
-                    tool_descriptor["endpoint"] = {
-                        "path": "/tools/call",
-                        "method": "POST"
-                    }
-                
-                payload = json.dumps([tool_descriptor])
+                payload = self._tools_json
                 for tag in ("tool_list", "tools"):
                     logger.debug(f"Sending event: {tag}")
                     yield f"event: {tag}\ndata: {payload}\n\n"
@@ -63,14 +78,21 @@ class SSETransport(BaseTransport):
                     time.sleep(15)
                     yield f": ka-{n}\n\n"
             
+            headers = {
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+                "Connection": "keep-alive",
+            }
+            events_stream = stream()
+            if self._accepts_gzip():
+                headers["Content-Encoding"] = "gzip"
+                headers["Vary"] = "Accept-Encoding"
+                events_stream = self._gzip_stream(events_stream)
+            
             return Response(
-                stream_with_context(stream()),
+                stream_with_context(events_stream),
                 mimetype="text/event-stream",
-                headers={
-                    "Cache-Control": "no-cache",
-                    "X-Accel-Buffering": "no",
-                    "Connection": "keep-alive",
-                },
+                headers=headers,
             )
         
         # Call handling endpoint
@@ -90,8 +112,7 @@ class SSETransport(BaseTransport):
                 }
                 
                 # Use the protocol handler to process the message
-                response_str = self.protocol_handler.process_message(json.dumps(message))
-                response = json.loads(response_str)
+                response = self.protocol_handler.process_dict(message)
                 
                 if "error" in response:
                     return jsonify({"error": response["error"]["message"]}), 400
@@ -105,14 +126,7 @@ class SSETransport(BaseTransport):
         # List tools endpoint
         @app.route("/tools/list", methods=["GET"])
         def tools_list():
-            tool_descriptor = get_tool_descriptor()
-            # Add endpoint info for SSE transport
-            if "endpoint" not in tool_descriptor:
-                tool_descriptor["endpoint"] = {
-                    "path": "/tools/call",
-                    "method": "POST"
-                }
-            return jsonify([tool_descriptor])
+            return Response(self._tools_json, mimetype="application/json")
         
         # Health check endpoint
         @app.route("/health", methods=["GET"])
@@ -131,14 +145,13 @@ class SSETransport(BaseTransport):
                     "id": "http-search",
                     "method": "call_tool",
                     "params": {
-                        "tool": get_tool_descriptor()["name"],
+                        "tool": self.protocol_handler.tool_name,
                         "args": data
                     }
                 }
                 
                 # Use the protocol handler to process the message
-                response_str = self.protocol_handler.process_message(json.dumps(message))
-                response = json.loads(response_str)
+                response = self.protocol_handler.process_dict(message)
                 
                 if "error" in response:
                     return jsonify({"error": response["error"]["message"]}), 400
@@ -151,12 +164,29 @@ class SSETransport(BaseTransport):
         
         return app
     
+    def _build_tools_json(self) -> str:
+        """Serialize the tool list once, with the endpoint info SSE clients need."""
+        tool_descriptor = dict(self.protocol_handler.tool_descriptor)
+        tool_descriptor.setdefault("endpoint", {"path": "/tools/call", "method": "POST"})
+        return json.dumps([tool_descriptor])
+    
+    def _accepts_gzip(self) -> bool:
+        """Check whether compression is enabled and the current client accepts gzip."""
+        return self.compression == "gzip" and "gzip" in request.headers.get("Accept-Encoding", "")
+    
+    @staticmethod
+    def _gzip_stream(chunks: Iterator[str]) -> Iterator[bytes]:
+        """Gzip an event stream, flushing after every event so nothing is held back."""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            yield compressor.compress(chunk.encode("utf-8")) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    
     def start(self):
         """Start the Flask server."""
         logger.info(f"Starting SSE transport on {self.host}:{self.port}")
         self._running = True
         
-        tool_name = get_tool_descriptor()["name"]
+        tool_name = self.protocol_handler.tool_name
         logger.info(f"Tool registration command:")
         logger.info(f"claude mcp add --transport sse {tool_name} http://{self.host}:{self.port}/events")
         
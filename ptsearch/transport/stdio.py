@@ -39,14 +39,14 @@ class STDIOTransport(BaseTransport):
         
         try:
             while self._running:
-                # Read a line from stdin
-                line = sys.stdin.readline()
+                # Read raw bytes from stdin; the JSON parser decodes UTF-8 itself
+                line = sys.stdin.buffer.readline()
                 if not line:
                     logger.info("End of input, shutting down")
                     break
                 
                 # Process the line and write response to stdout
-                response = self.protocol_handler.process_message(line.strip())
+                response = self.protocol_handler.process_message(line)
                 sys.stdout.write(response + "\n")
                 sys.stdout.flush()
                 
@@ -0,0 +1,85 @@
+"""
+Embedding request batching for PyTorch Documentation Search Tool.
+Kept free of the vector-store stack so both core and the flat modules can use it.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Optional, Sequence
+
+from ptsearch.config import settings
+from ptsearch.utils import logger
+
+
+class BatchingEmbedder:
+    """Coalesces concurrent single-query embedding calls into batched API requests.
+
+    Callers block on ``generate_embedding`` while a background thread collects up to
+    ``max_batch`` queries arriving within ``window_ms`` and embeds them in one call.
+    Any generator with ``generate_embedding`` and ``generate_embeddings`` can be wrapped.
+    """
+    
+    def __init__(self, generator: Any, max_batch: int = settings.embedding_max_batch,
+                 window_ms: int = settings.embedding_batch_window_ms):
+        """Initialize batching around an existing embedding generator."""
+        self.generator = generator
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+    
+    def generate_embedding(self, text: str) -> Sequence[float]:
+        """Generate embedding for a single text, batched with concurrent callers."""
+        # Batching only adds latency when it can't combine anything
+        if self.max_batch <= 1 or not text:
+            return self.generator.generate_embedding(text)
+        
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result()
+    
+    def _ensure_worker(self) -> None:
+        """Start the background batching thread on first use."""
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+    
+    def _run(self) -> None:
+        """Collect queued texts into batches and resolve their futures."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = self.generator.generate_embeddings(texts, batch_size=len(texts))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            logger.debug("Embedded query batch", size=len(texts))
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+            
+            # A short response must not leave callers blocked; embed the rest one by one
+            if len(embeddings) < len(batch):
+                logger.warning("Embedding batch came back short", expected=len(batch), received=len(embeddings))
+                for text, future in batch[len(embeddings):]:
+                    try:
+                        future.set_result(self.generator.generate_embedding(text))
+                    except Exception as e:
+                        future.set_exception(e)
@@ -0,0 +1,82 @@
+"""
+JSON chunk file I/O for PyTorch Documentation Search Tool.
+Reads and writes chunk files without the vector-store stack, so document processing can use it.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; without it JSON files are parsed whole
+    ijson = None
+
+
+def read_json(filepath: str) -> Any:
+    """Parse a JSON file, using orjson when it is installed."""
+    if orjson is not None:
+        with open(filepath, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def iter_chunks(filepath: str) -> Iterator[Dict[str, Any]]:
+    """Yield chunks from a JSON Lines file or JSON array, streaming when possible."""
+    if filepath.endswith(".jsonl"):
+        loads = orjson.loads if orjson is not None else json.loads
+        with open(filepath, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+    elif ijson is not None:
+        with open(filepath, 'rb') as f:
+            yield from ijson.items(f, 'item', use_float=True)
+    else:
+        yield from read_json(filepath)
+
+
+class ChunkWriter:
+    """Streams chunks to a JSON array, or JSON Lines for ``.jsonl`` paths, one at a time."""
+
+    def __init__(self, filepath: str):
+        """Open the output file."""
+        self.filepath = filepath
+        self.lines = filepath.endswith(".jsonl")
+        self.count = 0
+        self._file = open(filepath, 'w', encoding='utf-8')
+        if not self.lines:
+            self._file.write("[")
+
+    def write(self, chunks: Iterable[Dict[str, Any]]) -> None:
+        """Append chunks to the output."""
+        for chunk in chunks:
+            encoded = json.dumps(chunk, separators=(',', ':'))
+            if self.lines:
+                self._file.write(encoded + "\n")
+            else:
+                self._file.write(("," if self.count else "") + encoded)
+            self.count += 1
+
+    def close(self) -> None:
+        """Terminate the JSON array and close the file."""
+        if self._file.closed:
+            return
+        if not self.lines:
+            self._file.write("]")
+        self._file.close()
+
+    def __enter__(self) -> "ChunkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave a failed JSON array unterminated rather than looking complete
+            self._file.close()
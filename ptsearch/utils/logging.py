@@ -43,29 +43,34 @@ class StructuredLogger:
             return f"{message} {json.dumps(log_data)}"
         return message
     
-    def debug(self, message: str, **kwargs):
+    def debug(self, message: str, *args, **kwargs):
         """Log debug message with context."""
-        self.logger.debug(self._format_message(message, kwargs))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(self._format_message(message % args if args else message, kwargs))
     
-    def info(self, message: str, **kwargs):
+    def info(self, message: str, *args, **kwargs):
         """Log info message with context."""
-        self.logger.info(self._format_message(message, kwargs))
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(self._format_message(message % args if args else message, kwargs))
     
-    def warning(self, message: str, **kwargs):
+    def warning(self, message: str, *args, **kwargs):
         """Log warning message with context."""
-        self.logger.warning(self._format_message(message, kwargs))
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning(self._format_message(message % args if args else message, kwargs))
     
-    def error(self, message: str, **kwargs):
+    def error(self, message: str, *args, **kwargs):
         """Log error message with context."""
-        self.logger.error(self._format_message(message, kwargs))
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.error(self._format_message(message % args if args else message, kwargs))
     
-    def critical(self, message: str, **kwargs):
+    def critical(self, message: str, *args, **kwargs):
         """Log critical message with context."""
-        self.logger.critical(self._format_message(message, kwargs))
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self.logger.critical(self._format_message(message % args if args else message, kwargs))
     
-    def exception(self, message: str, **kwargs):
+    def exception(self, message: str, *args, **kwargs):
         """Log exception message with context and traceback."""
-        self.logger.exception(self._format_message(message, kwargs))
+        self.logger.exception(self._format_message(message % args if args else message, kwargs))
     
     def request_context(self, request_id: Optional[str] = None):
         """Create a new request context with unique ID."""
@@ -12,14 +12,14 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from ptsearch.embedding import EmbeddingGenerator
-from ptsearch.config import DEFAULT_CHUNKS_PATH, DEFAULT_EMBEDDINGS_PATH
+from ptsearch.config import settings
 
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Generate embeddings for document chunks")
-    parser.add_argument("--input-file", type=str, default=DEFAULT_CHUNKS_PATH,
+    parser.add_argument("--input-file", type=str, default=settings.default_chunks_path,
                       help="Input JSON file with document chunks")
-    parser.add_argument("--output-file", type=str, default=DEFAULT_EMBEDDINGS_PATH,
+    parser.add_argument("--output-file", type=str, default=settings.default_embeddings_path,
                       help="Output JSON file to save chunks with embeddings")
     parser.add_argument("--batch-size", type=int, default=20,
                       help="Batch size for embedding generation")
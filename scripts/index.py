@@ -12,12 +12,12 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from ptsearch.database import DatabaseManager
-from ptsearch.config import DEFAULT_EMBEDDINGS_PATH
+from ptsearch.config import settings
 
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Index chunks into database")
-    parser.add_argument("--input-file", type=str, default=DEFAULT_EMBEDDINGS_PATH,
+    parser.add_argument("--input-file", type=str, default=settings.default_embeddings_path,
                       help="Input JSON file with chunks and embeddings")
     parser.add_argument("--batch-size", type=int, default=50,
                       help="Batch size for database operations")
@@ -17,7 +17,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from ptsearch.database import DatabaseManager
 from ptsearch.embedding import EmbeddingGenerator
 from ptsearch.search import SearchEngine
-from ptsearch.config import MAX_RESULTS, logger
+from ptsearch.config import settings
+from ptsearch.utils import logger
 
 # Tool descriptor for MCP
 TOOL_NAME = "search_pytorch_docs"
@@ -0,0 +1,94 @@
+"""
+Unit tests for the binary chunk sidecar format.
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from ptsearch.config import settings
+from ptsearch.core.chunk_store import (ChunkWriter, SidecarWriter, has_sidecar, iter_chunks, load_chunks,
+                                       save_chunks, sidecar_paths)
+from ptsearch.core.database import DatabaseManager
+
+
+def make_chunks(count):
+    """Create chunks with distinct constant embeddings."""
+    return [
+        {
+            "id": f"chunk-{i}",
+            "text": f"Document {i}",
+            "embedding": [float(i + 1)] * settings.embedding_dimensions,
+            "metadata": {"chunk_type": "text"}
+        }
+        for i in range(count)
+    ]
+
+
+class TestChunkStore:
+    """Test class for the chunk sidecar."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that saved chunks load back with memory-mapped embeddings."""
+        path = str(tmp_path / "chunks_with_embeddings.json")
+        save_chunks(make_chunks(3), path, settings.embedding_dimensions)
+
+        records, embeddings = load_chunks(path)
+
+        assert sidecar_paths(path)[0].endswith("chunks_with_embeddings.npy")
+        assert isinstance(embeddings, np.memmap)
+        assert embeddings.shape == (3, settings.embedding_dimensions)
+        assert embeddings[2, 0] == pytest.approx(3.0)
+        assert records[1] == {"id": "chunk-1", "text": "Document 1", "metadata": {"chunk_type": "text"}}
+
+    def test_stale_sidecar_is_ignored(self, tmp_path):
+        """Test that a JSON file newer than its sidecar wins."""
+        path = tmp_path / "chunks_with_embeddings.json"
+        save_chunks(make_chunks(1), str(path), settings.embedding_dimensions)
+        assert has_sidecar(str(path))
+
+        path.write_text(json.dumps(make_chunks(1)))
+        npy_path = sidecar_paths(str(path))[0]
+        os.utime(npy_path, (0, 0))
+
+        assert not has_sidecar(str(path))
+
+    def test_database_loads_from_sidecar(self, tmp_path):
+        """Test that DatabaseManager.load_from_file uses the sidecar when present."""
+        path = str(tmp_path / "chunks_with_embeddings.json")
+        save_chunks(make_chunks(7), path, settings.embedding_dimensions)
+
+        db_manager = DatabaseManager(db_dir=str(tmp_path / "db"))
+        db_manager.load_from_file(path, batch_size=3)
+
+        assert db_manager.get_stats()["total_chunks"] == 7
+
+    @pytest.mark.parametrize("filename", ["chunks.json", "chunks.jsonl"])
+    def test_streamed_writers_round_trip(self, tmp_path, filename):
+        """Test that chunks written in batches read back in order from both formats."""
+        path = str(tmp_path / filename)
+        chunks = make_chunks(5)
+
+        with ChunkWriter(path) as writer, SidecarWriter(path, settings.embedding_dimensions) as sidecar:
+            for start in range(0, 5, 2):
+                writer.write(chunks[start:start + 2])
+                sidecar.write(chunks[start:start + 2])
+
+        records, embeddings = load_chunks(path)
+
+        assert list(iter_chunks(path)) == chunks
+        assert [record["id"] for record in records] == [chunk["id"] for chunk in chunks]
+        assert embeddings[:, 0].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    def test_failed_sidecar_is_discarded(self, tmp_path):
+        """Test that an error while streaming leaves no sidecar behind."""
+        path = str(tmp_path / "chunks.json")
+
+        with pytest.raises(RuntimeError):
+            with SidecarWriter(path, settings.embedding_dimensions) as sidecar:
+                sidecar.write(make_chunks(2))
+                raise RuntimeError("embedding failed")
+
+        assert os.listdir(tmp_path) == []
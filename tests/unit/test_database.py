@@ -0,0 +1,128 @@
+"""
+Unit tests for the ChromaDB database manager.
+"""
+
+import json
+
+import pytest
+
+from ptsearch.config import settings
+from ptsearch.core.database import DatabaseManager
+from ptsearch.utils.error import DatabaseError
+
+
+class TestDatabaseManager:
+    """Test class for ChromaDB database manager."""
+
+    @pytest.fixture
+    def db_manager(self, tmp_path):
+        """Create a database manager in a temporary directory."""
+        return DatabaseManager(db_dir=str(tmp_path))
+
+    def test_collection_handle_is_cached(self, db_manager, monkeypatch):
+        """Test that the collection is only looked up once."""
+        first = db_manager.get_collection()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("collection looked up again")
+
+        monkeypatch.setattr(db_manager.client, "get_or_create_collection", fail)
+
+        assert db_manager.get_collection() is first
+        assert db_manager.get_stats()["total_chunks"] == 0
+
+    def test_reset_replaces_cached_handle(self, db_manager):
+        """Test that reset_collection swaps in the new collection."""
+        db_manager.add_chunks([{
+            "id": "chunk-0",
+            "text": "Document 0",
+            "embedding": [0.1] * settings.embedding_dimensions,
+            "metadata": {"chunk_type": "text"}
+        }])
+        assert db_manager.get_stats()["total_chunks"] == 1
+
+        db_manager.reset_collection()
+
+        assert db_manager.get_stats()["total_chunks"] == 0
+
+    def test_add_chunks_in_parallel_batches(self, db_manager):
+        """Test that every batch is inserted, including malformed embeddings."""
+        chunks = [
+            {
+                "id": f"chunk-{i}",
+                "text": f"Document {i}",
+                "embedding": [float(i + 1)] * settings.embedding_dimensions if i % 5 else [],
+                "metadata": {"chunk_type": "text"}
+            }
+            for i in range(23)
+        ]
+
+        db_manager.add_chunks(chunks, batch_size=5)
+
+        assert db_manager.get_stats()["total_chunks"] == 23
+        stored = db_manager.get_collection().get(ids=["chunk-0", "chunk-3"], include=["embeddings"])
+        by_id = dict(zip(stored["ids"], stored["embeddings"]))
+        assert not any(by_id["chunk-0"])
+        # Stored vectors are unit-normalized for the inner-product space
+        assert by_id["chunk-3"][0] == pytest.approx(settings.embedding_dimensions ** -0.5)
+
+        results = db_manager.query([2.0] * settings.embedding_dimensions, n_results=1)
+        assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-4)
+
+    def test_chunk_number_is_stored_in_metadata(self, db_manager):
+        """Test that split chunks sharing a metadata dict keep their chunk numbers in the store."""
+        shared = {"chunk_type": "text", "title": "Guide"}
+        db_manager.add_chunks([
+            {"id": f"part-{i}", "text": f"Part {i}", "embedding": [0.5] * settings.embedding_dimensions,
+             "metadata": shared, "chunk": i}
+            for i in range(2)
+        ])
+
+        stored = db_manager.get_collection().get(ids=["part-0", "part-1"], include=["metadatas"])
+
+        assert {meta["chunk"] for meta in stored["metadatas"]} == {0, 1}
+        assert "chunk" not in shared
+
+    def test_load_rejects_wrong_dimensions(self, db_manager, tmp_path):
+        """Test that load_from_file refuses embeddings of the wrong size."""
+        chunks_file = tmp_path / "chunks.json"
+        chunks_file.write_text(json.dumps([
+            {"id": "ok", "text": "a", "embedding": [0.1] * settings.embedding_dimensions, "metadata": {}},
+            {"id": "short", "text": "b", "embedding": [0.1, 0.2], "metadata": {}}
+        ]))
+
+        with pytest.raises(DatabaseError, match="1 chunks"):
+            db_manager.load_from_file(str(chunks_file))
+
+    def test_load_streams_json_in_batches(self, db_manager, tmp_path):
+        """Test that load_from_file inserts every chunk from a JSON array."""
+        chunks_file = tmp_path / "chunks.json"
+        chunks_file.write_text(json.dumps([
+            {"id": f"chunk-{i}", "text": f"Document {i}",
+             "embedding": [0.5] * settings.embedding_dimensions, "metadata": {"chunk_type": "text"}}
+            for i in range(7)
+        ]))
+
+        db_manager.load_from_file(str(chunks_file), batch_size=3)
+
+        assert db_manager.get_stats()["total_chunks"] == 7
+
+    def test_streaming_load_validates_before_reset(self, db_manager, tmp_path):
+        """Test that a bad embedding late in a streamed file leaves the existing collection intact."""
+        db_manager.add_chunks([
+            {"id": f"old-{i}", "text": "old", "embedding": [0.5] * settings.embedding_dimensions, "metadata": {"chunk_type": "text"}}
+            for i in range(5)
+        ])
+        chunks = [
+            {"id": f"new-{i}", "text": "new", "embedding": [0.5] * settings.embedding_dimensions, "metadata": {"chunk_type": "text"}}
+            for i in range(4)
+        ]
+        chunks.append({"id": "short", "text": "bad", "embedding": [0.1, 0.2], "metadata": {"chunk_type": "text"}})
+        chunks_file = tmp_path / "chunks.jsonl"
+        chunks_file.write_text("".join(json.dumps(chunk) + "\n" for chunk in chunks))
+
+        with pytest.raises(DatabaseError, match="1 chunks"):
+            db_manager.load_from_file(str(chunks_file), batch_size=2)
+
+        stored = db_manager.get_collection().get()["ids"]
+        assert sorted(stored) == [f"old-{i}" for i in range(5)]
@@ -0,0 +1,180 @@
+"""
+Unit tests for document processing.
+"""
+
+import json
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip("tree_sitter_languages")
+
+from ptsearch import document as document_module
+from ptsearch.document import DocumentProcessor, MIN_PARALLEL_FILES
+
+
+def write_docs(directory, count):
+    """Write markdown files mixing prose and code blocks."""
+    for i in range(count):
+        (directory / f"doc{i}.md").write_text(
+            f"# Doc {i}\n\nParagraph about tensors {i}.\n\n"
+            f"```python\nimport torch\nx = torch.ones({i})\n```\n"
+        )
+
+
+class TestDocumentProcessor:
+    """Test class for document processor."""
+
+    @pytest.fixture
+    def processor(self):
+        """Create a document processor."""
+        return DocumentProcessor(chunk_size=200, overlap=20, cache_dir=None)
+
+    def test_parallel_matches_sequential(self, processor, tmp_path):
+        """Test that the process pool yields the same chunks as a sequential run."""
+        write_docs(tmp_path, MIN_PARALLEL_FILES + 2)
+
+        sequential = list(processor.iter_directory(str(tmp_path), max_workers=1))
+        parallel = list(processor.iter_directory(str(tmp_path), max_workers=2))
+
+        def key(chunks):
+            return sorted((c["metadata"]["source"], c["metadata"]["chunk_type"], c["text"]) for c in chunks)
+
+        assert len(parallel) == len(sequential) > 0
+        assert key(parallel) == key(sequential)
+
+    def test_parse_cache_reuses_chunks(self, tmp_path):
+        """Test that unchanged files are served from the parse cache."""
+        cache_dir = tmp_path / "cache"
+        processor = DocumentProcessor(chunk_size=200, overlap=20, cache_dir=str(cache_dir))
+        write_docs(tmp_path, 1)
+        doc = str(tmp_path / "doc0.md")
+
+        first = processor.process_file(doc)
+        processor._chunk_sections = None  # any re-parse would now fail
+        second = processor.process_file(doc)
+
+        assert len(list(cache_dir.glob("*.json"))) == 1
+        assert [c["text"] for c in second] == [c["text"] for c in first]
+        assert [c["id"] for c in second] == [c["id"] for c in first]
+
+    def test_parse_cache_misses_on_change(self, tmp_path):
+        """Test that edited content is re-parsed."""
+        cache_dir = tmp_path / "cache"
+        processor = DocumentProcessor(chunk_size=200, overlap=20, cache_dir=str(cache_dir))
+        doc = tmp_path / "doc.md"
+        doc.write_text("# Old\n\nOld text.\n")
+        processor.process_file(str(doc))
+
+        doc.write_text("# New\n\nNew text.\n")
+        chunks = processor.process_file(str(doc))
+
+        assert "New text." in chunks[0]["text"]
+        assert len(list(cache_dir.glob("*.json"))) == 2
+
+    def test_code_chunk_points(self, processor):
+        """Test that split points land on definitions at least 5 lines apart."""
+        code = (
+            "import torch\n"
+            "def a():\n    pass\n"
+            "def b():\n    pass\n"
+            "\n\n\n"
+            "class C:\n    pass\n"
+        )
+
+        points = processor._find_code_chunk_points(code)
+
+        assert [code[p:].split("\n", 1)[0] for p in points] == ["def a():", "class C:"]
+
+    def test_chunk_ids_are_deterministic_and_unique(self, processor, tmp_path):
+        """Test that ids repeat across runs and repeated snippets get distinct ids."""
+        doc = tmp_path / "repeat.md"
+        doc.write_text("# Repeat\n\n```python\nx = 1\n```\n\n```python\nx = 1\n```\n")
+
+        first = processor.process_file(str(doc))
+        second = processor.process_file(str(doc))
+
+        ids = [chunk["id"] for chunk in first]
+        assert ids == [chunk["id"] for chunk in second]
+        assert len(set(ids)) == len(ids) == 2
+        assert ids[1] == ids[0] + "-1"
+
+    def test_text_chunking_splits(self, processor):
+        """Test paragraph splits on whitespace-only lines and sentence splits after terminators."""
+        text = "First para.\n  \nSecond para.\n\n\nThird para."
+        chunks = DocumentProcessor(chunk_size=15, overlap=0, cache_dir=None)._chunk_text(
+            text, {"source": "t.md", "chunk_type": "text"})
+
+        assert [c["text"] for c in chunks] == ["First para.", "Second para.", "Third para."]
+
+        long_para = "One sentence here. Another one?  Yes! Done"
+        pieces = DocumentProcessor(chunk_size=20, overlap=0, cache_dir=None)._split_large_paragraph(
+            long_para, {"source": "t.md", "chunk_type": "text"}, 1)
+
+        assert "".join(c["text"] for c in pieces).replace(" ", "") == long_para.replace(" ", "")
+
+    def test_process_directory_streams_to_jsonl(self, processor, tmp_path):
+        """Test that process_directory writes one chunk per line and returns the count."""
+        docs = tmp_path / "docs"
+        for sub in ("a", "b"):
+            (docs / sub).mkdir(parents=True)
+            (docs / sub / "index.md").write_text("# Same\n\nIdentical page.\n")
+        output_file = tmp_path / "chunks.jsonl"
+
+        count = processor.process_directory(str(docs), str(output_file))
+
+        lines = output_file.read_text().splitlines()
+        ids = [json.loads(line)["id"] for line in lines]
+        assert count == len(lines) == 2
+        assert ids[1] == ids[0] + "-1"
+
+    def test_small_markdown_fast_path_matches_tree_sitter(self, processor, monkeypatch):
+        """Test that the line scanner and Tree-sitter produce the same sections."""
+        content = (
+            "# Guide\n\nIntro line one.\nIntro line two.\n\n## Install\n\n"
+            "```bash\npip install torch\n```\nAfter code.\n### Usage\n```python\n\nx = 1\n```\n"
+        )
+
+        fast = processor._parse_markdown(content, "guide.md")
+        monkeypatch.setattr(document_module, "FAST_PARSE_MAX_CHARS", 0)
+        full = processor._parse_markdown(content, "guide.md")
+
+        assert fast == full
+        assert [(s["metadata"]["title"], s["metadata"]["chunk_type"]) for s in fast] == [
+            ("Guide", "text"), ("Install", "code"), ("Install", "text"), ("Usage", "code")]
+        assert fast[1]["metadata"]["language"] == "bash"
+
+    def test_fast_path_defers_complex_markdown(self):
+        """Test that lists and quotes are left to Tree-sitter."""
+        assert document_module._scan_simple_markdown("# T\n\n- item\n", "t.md", "T") is None
+        assert document_module._scan_simple_markdown("> quote\n", "t.md", "T") is None
+
+    def test_iter_directory_walks_sorted_doc_files(self, processor, tmp_path):
+        """Test that only visible doc files are picked up, in sorted path order."""
+        for name in ("b.py", "a.markdown", "notes.txt", ".hidden.md"):
+            (tmp_path / name).write_text("# Title\n\nSome text.\n")
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".git" / "skip.md").write_text("# Skip\n")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "c.md").write_text("# Sub\n\nMore text.\n")
+
+        sources = [c["metadata"]["source"] for c in processor.iter_directory(str(tmp_path), max_workers=1)]
+
+        assert list(dict.fromkeys(sources)) == ["a.markdown", "b.py", "c.md"]
+
+    def test_process_directory_skips_vector_store_stack(self, tmp_path):
+        """Test that writing chunks never imports chromadb, so parse workers stay light."""
+        write_docs(tmp_path, 2)
+        script = textwrap.dedent(f"""
+            import sys
+            from ptsearch.document import DocumentProcessor
+            processor = DocumentProcessor(chunk_size=200, overlap=20, cache_dir=None)
+            processor.process_directory({str(tmp_path)!r}, output_file={str(tmp_path / "chunks.json")!r})
+            assert 'chromadb' not in sys.modules, 'chromadb imported'
+        """)
+
+        subprocess.run([sys.executable, "-c", script], check=True, capture_output=True)
+
+        assert len(json.loads((tmp_path / "chunks.json").read_text())) == 4
@@ -0,0 +1,242 @@
+"""
+Unit tests for query embedding batching and caching.
+"""
+
+import asyncio
+import base64
+import dataclasses
+import json
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ptsearch.config import settings
+from ptsearch.core.chunk_store import has_sidecar
+from ptsearch.core import embedding as embedding_module
+from ptsearch.core.embedding import BatchingEmbedder, EmbeddingGenerator
+
+
+class FakeGenerator:
+    """Embedding generator stub that records batch sizes."""
+
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+
+    def generate_embedding(self, text):
+        self.batches.append([text])
+        return [float(len(text))]
+
+    def generate_embeddings(self, texts, batch_size=20):
+        # Hold the first batch until every caller has queued its text
+        self.release.wait(timeout=5)
+        self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+class TestBatchingEmbedder:
+    """Test class for the batching embedder."""
+
+    def test_concurrent_queries_share_batches(self):
+        """Test that concurrent callers get their own embeddings from shared API calls."""
+        generator = FakeGenerator()
+        embedder = BatchingEmbedder(generator, max_batch=8, window_ms=50)
+        texts = ["a" * (i + 1) for i in range(6)]
+        results = {}
+
+        def embed(text):
+            results[text] = embedder.generate_embedding(text)
+
+        threads = [threading.Thread(target=embed, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        generator.release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert results == {text: [float(len(text))] for text in texts}
+        assert sum(len(batch) for batch in generator.batches) == 6
+        assert len(generator.batches) < 6
+
+    def test_short_batch_response_resolves_every_caller(self):
+        """Test that texts missing from a short batch response are embedded singly."""
+        generator = FakeGenerator()
+        generator.generate_embeddings = lambda texts, batch_size=20: [[float(len(texts[0]))]]
+        embedder = BatchingEmbedder(generator, max_batch=8, window_ms=200)
+        results = {}
+
+        def embed(text):
+            results[text] = embedder.generate_embedding(text)
+
+        threads = [threading.Thread(target=embed, args=(text,)) for text in ("a", "bb", "ccc")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert results == {"a": [1.0], "bb": [2.0], "ccc": [3.0]}
+        assert not any(thread.is_alive() for thread in threads)
+
+    def test_batch_size_one_calls_directly(self):
+        """Test that disabling batching bypasses the worker thread."""
+        generator = FakeGenerator()
+        embedder = BatchingEmbedder(generator, max_batch=1)
+
+        assert embedder.generate_embedding("abc") == [3.0]
+        assert generator.batches == [["abc"]]
+        assert embedder._worker is None
+
+
+class TestEmbeddingCache:
+    """Test class for the SQLite embedding cache."""
+
+    @pytest.fixture
+    def generator(self, tmp_path):
+        """Create an embedding generator with a cache in a temporary directory."""
+        return EmbeddingGenerator(api_key="test-key", cache_dir=str(tmp_path))
+
+    def test_round_trip(self, generator):
+        """Test that saved embeddings are returned as float lists."""
+        generator._save_many_to_cache(["alpha", "beta"], [[0.5, 1.5], [2.0, -1.0]])
+
+        assert generator._get_from_cache("alpha") == [0.5, 1.5]
+        assert generator._get_from_cache("beta") == [2.0, -1.0]
+        assert generator._get_from_cache("gamma") is None
+
+    def test_cache_persists_across_instances(self, generator, tmp_path):
+        """Test that a new generator reads embeddings written by an earlier one."""
+        generator._save_to_cache("alpha", [0.25, 0.75])
+
+        reopened = EmbeddingGenerator(api_key="test-key", cache_dir=str(tmp_path))
+
+        assert reopened._get_from_cache("alpha") == [0.25, 0.75]
+        assert reopened._cache_bytes == 2 * np.dtype(settings.embedding_cache_dtype).itemsize
+
+    def test_evicts_least_recently_used(self, generator, monkeypatch):
+        """Test that exceeding the size budget drops the oldest-accessed entries."""
+        vector = [0.0] * settings.embedding_dimensions
+        row_bytes = np.dtype(settings.embedding_cache_dtype).itemsize * settings.embedding_dimensions
+        monkeypatch.setattr(embedding_module, "settings",
+                            dataclasses.replace(settings, max_cache_size_gb=2.5 * row_bytes / 1024 ** 3))
+
+        generator._save_to_cache("old", vector)
+        generator._save_to_cache("recent", vector)
+        generator._get_from_cache("old")
+        generator._save_to_cache("new", vector)
+
+        assert generator._get_from_cache("recent") is None
+        assert generator._get_from_cache("old") is not None
+        assert generator._get_from_cache("new") is not None
+
+    def test_batch_mixes_cached_and_fresh(self, generator, monkeypatch):
+        """Test that cached and API embeddings keep their input positions."""
+        generator._save_to_cache("cached", [1.0, 1.0])
+        requested = []
+
+        def create(input, model):
+            requested.append(list(input))
+            return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(text)), 0.0]) for text in input])
+
+        monkeypatch.setattr(generator.client.embeddings, "create", create)
+
+        result = generator.generate_embeddings(["fresh", "cached", "xy"], batch_size=3)
+
+        assert requested == [["fresh", "xy"]]
+        assert result == [[5.0, 0.0], [1.0, 1.0], [2.0, 0.0]]
+
+    def test_batches_embedded_concurrently(self, generator, monkeypatch):
+        """Test that uncached batches run concurrently and keep their order."""
+        monkeypatch.setattr(embedding_module, "settings",
+                            dataclasses.replace(settings, embedding_concurrency=3, embedding_rpm=60000))
+        in_flight = []
+        peak = []
+
+        async def embed_batch(aclient, texts):
+            in_flight.append(texts)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(texts)
+            return [[float(len(text)), 0.0] for text in texts]
+
+        monkeypatch.setattr(generator, "_embed_batch_async", embed_batch)
+        texts = ["a" * (i + 1) for i in range(6)]
+
+        result = generator.generate_embeddings(texts, batch_size=2)
+
+        assert result == [[float(i + 1), 0.0] for i in range(6)]
+        assert max(peak) == 3
+        assert generator._get_from_cache("aaaa") == [4.0, 0.0]
+
+    @pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+    def test_quantized_round_trip(self, generator, monkeypatch, dtype):
+        """Test that each cache dtype decodes close to the original vector."""
+        monkeypatch.setattr(embedding_module, "settings",
+                            dataclasses.replace(settings, embedding_cache_dtype=dtype))
+        vector = np.random.default_rng(0).uniform(-1, 1, 64).tolist()
+
+        generator._save_to_cache("vector", vector)
+        restored = generator._get_from_cache("vector")
+
+        assert generator._cache_bytes == 64 * np.dtype(dtype).itemsize
+        assert restored == pytest.approx(vector, abs=1e-2)
+
+    def test_process_file_streams_windows(self, generator, monkeypatch, tmp_path):
+        """Test that process_file embeds JSON Lines input window by window."""
+        monkeypatch.setattr(embedding_module, "settings",
+                            dataclasses.replace(settings, embedding_concurrency=1))
+        windows = []
+
+        def generate(texts, batch_size=20):
+            windows.append(len(texts))
+            return [[float(len(text))] * settings.embedding_dimensions for text in texts]
+
+        monkeypatch.setattr(generator, "generate_embeddings", generate)
+        input_file = tmp_path / "chunks.jsonl"
+        input_file.write_text("".join(json.dumps({"id": str(i), "text": "t" * (i + 1)}) + "\n" for i in range(5)))
+        output_file = str(tmp_path / "out.json")
+
+        count = generator.process_file(str(input_file), output_file, batch_size=2)
+
+        assert count == 5
+        assert windows == [2, 2, 1]
+        with open(output_file) as f:
+            saved = json.load(f)
+        assert [chunk["embedding"][0] for chunk in saved] == [1.0, 2.0, 3.0, 4.0, 5.0]
+        assert has_sidecar(output_file)
+
+    def test_duplicate_texts_embedded_once(self, generator, monkeypatch):
+        """Test that repeated texts share one API input and one cache probe."""
+        requested = []
+
+        def create(input, model):
+            requested.append(list(input))
+            return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(text)), 0.0]) for text in input])
+
+        monkeypatch.setattr(generator.client.embeddings, "create", create)
+
+        result = generator.generate_embeddings(["import torch", "x", "import torch", "x"], batch_size=10)
+
+        assert requested == [["import torch", "x"]]
+        assert result == [[12.0, 0.0], [1.0, 0.0], [12.0, 0.0], [1.0, 0.0]]
+        assert generator.stats["misses"] == 2
+
+    def test_single_embedding_decoded_from_base64(self, generator, monkeypatch):
+        """Test that query embeddings are requested as base64 and returned as float32 arrays."""
+        vector = np.array([0.5, -1.25, 2.0], dtype="<f4")
+        formats = []
+
+        def create(input, model, encoding_format=None):
+            formats.append(encoding_format)
+            encoded = base64.b64encode(vector.tobytes()).decode()
+            return SimpleNamespace(data=[SimpleNamespace(embedding=encoded)])
+
+        monkeypatch.setattr(generator.client.embeddings, "create", create)
+
+        fresh = generator.generate_embedding("query")
+        cached = generator.generate_embedding("query")
+
+        assert formats == ["base64"]
+        assert fresh.dtype == np.float32 and fresh.tolist() == vector.tolist()
+        assert isinstance(cached, np.ndarray) and cached.tolist() == pytest.approx(vector.tolist(), abs=1e-2)
@@ -0,0 +1,114 @@
+"""
+Unit tests for the FAISS vector index backend.
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from ptsearch.config import settings
+from ptsearch.core import faiss_backend
+from ptsearch.core.faiss_backend import FaissBackend
+
+
+def make_chunks(count):
+    """Create chunks with random embeddings alternating between text and code."""
+    rng = np.random.default_rng(42)
+    return [
+        {
+            "id": f"chunk-{i}",
+            "text": f"Document {i}",
+            "embedding": rng.standard_normal(settings.embedding_dimensions).tolist(),
+            "metadata": {"title": f"Title {i}", "chunk_type": "code" if i % 2 else "text"}
+        }
+        for i in range(count)
+    ]
+
+
+class TestFaissBackend:
+    """Test class for FAISS backend."""
+
+    @pytest.fixture
+    def backend(self, tmp_path):
+        """Create a FAISS backend in a temporary directory."""
+        return FaissBackend(db_dir=str(tmp_path))
+
+    def test_query_returns_nearest_chunk(self, backend):
+        """Test that querying with a stored vector returns that chunk first."""
+        chunks = make_chunks(20)
+        backend.add_chunks(chunks)
+
+        results = backend.query(chunks[7]["embedding"], n_results=3)
+
+        assert results["ids"][0][0] == "chunk-7"
+        assert results["documents"][0][0] == "Document 7"
+        assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+        assert len(results["ids"][0]) == 3
+
+    def test_query_with_filter(self, backend):
+        """Test that metadata filters restrict results."""
+        chunks = make_chunks(20)
+        backend.add_chunks(chunks)
+
+        results = backend.query(chunks[4]["embedding"], n_results=5, filters={"chunk_type": "code"})
+
+        assert len(results["ids"][0]) == 5
+        assert all(meta["chunk_type"] == "code" for meta in results["metadatas"][0])
+
+    def test_chunk_number_is_stored_in_metadata(self, backend):
+        """Test that a split chunk's top-level chunk number comes back in its metadata."""
+        chunks = make_chunks(3)
+        shared = chunks[0]["metadata"]
+        chunks[1]["metadata"] = shared
+        chunks[1]["chunk"] = 1
+        backend.add_chunks(chunks)
+
+        results = backend.query(chunks[1]["embedding"], n_results=1)
+
+        assert results["metadatas"][0][0] == {**shared, "chunk": 1}
+        assert "chunk" not in shared
+
+    @pytest.mark.parametrize("quant_mode", ["fp32", "fp16"])
+    def test_exhaustive_index_is_retrained_as_ivf(self, tmp_path, monkeypatch, quant_mode):
+        """Test that a store that outgrows the exhaustive index is rebuilt as IVF with its old vectors."""
+        monkeypatch.setattr(faiss_backend, "MIN_TRAIN_VECTORS", 40)
+        backend = FaissBackend(db_dir=str(tmp_path), quant_mode=quant_mode, nprobe=64)
+        chunks = make_chunks(60)
+        backend.add_chunks(chunks[:20], batch_size=7)
+        assert backend._ivf(backend.index) is None
+
+        backend.add_chunks(chunks[20:], batch_size=7)
+
+        assert backend._ivf(backend.index) is not None
+        assert backend.get_stats()["total_chunks"] == 60
+        assert backend.query(chunks[3]["embedding"], n_results=1)["ids"][0] == ["chunk-3"]
+        assert backend.query(chunks[45]["embedding"], n_results=1)["ids"][0] == ["chunk-45"]
+
+    def test_index_is_persisted(self, backend, tmp_path):
+        """Test that a new backend reloads the saved index."""
+        chunks = make_chunks(10)
+        backend.add_chunks(chunks)
+
+        reloaded = FaissBackend(db_dir=str(tmp_path))
+
+        assert reloaded.get_stats()["total_chunks"] == 10
+        assert reloaded.query(chunks[3]["embedding"], n_results=1)["ids"][0] == ["chunk-3"]
+
+    def test_empty_index(self, backend):
+        """Test querying before anything is indexed."""
+        results = backend.query([0.1] * settings.embedding_dimensions)
+
+        assert results["ids"] == [[]]
+
+    @pytest.mark.parametrize("quant_mode", ["int8", "fp16"])
+    def test_scalar_quantized_index(self, tmp_path, quant_mode):
+        """Test that scalar-quantized indexes still return the nearest chunk."""
+        backend = FaissBackend(db_dir=str(tmp_path), quant_mode=quant_mode)
+        chunks = make_chunks(20)
+        backend.add_chunks(chunks)
+
+        results = backend.query(chunks[5]["embedding"], n_results=3, filters={"chunk_type": "code"})
+
+        assert backend.get_stats()["index_type"] == "IndexScalarQuantizer"
+        assert results["ids"][0][0] == "chunk-5"
@@ -0,0 +1,91 @@
+"""
+Unit tests for the result formatter.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from ptsearch.core.formatter import MAX_SNIPPET_LENGTH, ResultFormatter
+
+
+class TestResultFormatter:
+    """Test class for result formatter."""
+
+    @pytest.fixture
+    def formatter(self):
+        """Create a result formatter."""
+        return ResultFormatter()
+
+    def test_format_results_scores_and_snippets(self, formatter):
+        """Test that distances become rounded similarities and long documents are truncated."""
+        long_doc = "x" * (MAX_SNIPPET_LENGTH + 10)
+        raw = {
+            "documents": [["short", long_doc, "broken"]],
+            "metadatas": [[{"title": "A", "chunk_type": "code"}, None, {"source": "s"}]],
+            "distances": [[0.123456, np.float32(0.25), None]],
+        }
+
+        results = formatter.format_results(raw, "query")["results"]
+
+        assert [r["score"] for r in results] == [0.8765, 0.75, 0.5]
+        assert results[1]["snippet"] == "x" * MAX_SNIPPET_LENGTH + "..."
+        assert results[1]["title"] == "Result 2"
+        assert results[2]["chunk_type"] == "unknown"
+        assert results[2]["source"] == "s"
+
+    def test_format_results_stops_at_shortest_list(self, formatter):
+        """Test that mismatched result lists are zipped to the shortest one."""
+        raw = {"documents": ["a", "b"], "metadatas": [{}, {}], "distances": [0.1]}
+
+        assert formatter.format_results(raw, "query")["count"] == 1
+
+    def test_format_results_accepts_arrays(self, formatter):
+        """Test that NumPy result columns format the same as nested lists."""
+        raw = {
+            "documents": np.array([["a", "b"]], dtype=object),
+            "metadatas": np.array([[{"title": "A"}, {"title": "B"}]], dtype=object),
+            "distances": np.array([[0.25, 0.5]], dtype=np.float32),
+        }
+        
+        results = formatter.format_results(raw, "query")["results"]
+        
+        assert [(r["title"], r["score"]) for r in results] == [("A", 0.75), ("B", 0.5)]
+        assert json.loads(json.dumps(results)) == results
+
+    def test_non_scalar_distances_fall_back(self, formatter):
+        """Test that nested distance entries score 0.5 without failing the batch."""
+        assert formatter._similarity_scores([0.2, [0.1, 0.3]]) == [0.8, 0.5]
+
+    def test_rank_results_boosts_and_keeps_top_k(self, formatter):
+        """Test that matching content types are boosted and only the best top_k are kept."""
+        results = {
+            "query": "tensor example",
+            "count": 4,
+            "results": [
+                {"title": "Intro", "chunk_type": "text", "score": 0.8},
+                {"title": "Tensor code", "chunk_type": "code", "score": 0.7},
+                {"title": "Other", "chunk_type": "code", "score": 0.6},
+                {"title": "Misc", "chunk_type": "unknown", "score": 0.75},
+            ],
+        }
+
+        ranked = formatter.rank_results(results, is_code_query=True, top_k=2)
+
+        assert [r["title"] for r in ranked["results"]] == ["Tensor code", "Intro"]
+        assert ranked["results"][0]["score"] == 0.924
+        assert ranked["results"][0]["title_match"] is True
+        assert ranked["results"][0]["match_reason"] == "code query & code content"
+        assert ranked["count"] == 2
+
+    def test_rank_results_accepts_row_iterator(self, formatter):
+        """Test that lazily formatted rows can be ranked without building a list first."""
+        raw = {"documents": ["a", "b"], "metadatas": [{"chunk_type": "text"}, {"chunk_type": "code"}],
+               "distances": [0.4, 0.3]}
+
+        ranked = formatter.rank_results({"query": "q", "results": formatter.format_results_iter(raw)},
+                                        is_code_query=True)
+
+        assert [r["score"] for r in ranked["results"]] == [0.84, 0.6]
+        assert ranked["count"] == 2
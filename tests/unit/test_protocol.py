@@ -5,32 +5,66 @@ Unit tests for MCP protocol handler.
 import json
 import pytest
 
+from ptsearch.config import settings
 from ptsearch.protocol import MCPProtocolHandler
+from ptsearch.protocol import handler as handler_module
 from ptsearch.utils.error import ProtocolError
 
 
+def _request(message):
+    """Encode a request message the way a client sends it over the wire."""
+    return json.dumps(message).encode("utf-8")
+
+
+# Request payloads are constant, so encode them once per module
+_INIT_REQ = _request({"jsonrpc": "2.0", "id": "test", "method": "initialize"})
+_LIST_REQ = _request({"jsonrpc": "2.0", "id": "test", "method": "list_tools"})
+
+# Messages that don't touch the fixed results go through process_dict, skipping JSON entirely
+_INVALID_METHOD_MSG = {"jsonrpc": "2.0", "id": "test", "method": "invalid_method"}
+_CALL_TOOL_MSG = {
+    "jsonrpc": "2.0",
+    "id": "test",
+    "method": "call_tool",
+    "params": {"tool": settings.tool_name, "args": {"query": "test query"}}
+}
+_UNKNOWN_TOOL_MSG = {
+    "jsonrpc": "2.0",
+    "id": "test",
+    "method": "call_tool",
+    "params": {"tool": "unknown_tool", "args": {"query": "test query"}}
+}
+
 def mock_search_handler(args):
     """Mock search handler for testing."""
     return {"results": [{"title": "Test Result"}], "query": args.get("query", ""), "count": 1}
 
 
+def full_search_handler(args):
+    """Mock search handler returning rows shaped like real formatted results."""
+    return {
+        "results": [
+            {"title": "DataLoader Example", "snippet": "This is a PyTorch DataLoader example.",
+             "source": "https://pytorch.org/docs/stable/data.html", "chunk_type": "code", "score": 0.95},
+            {"title": "PyTorch Basics", "snippet": "Another PyTorch sample.",
+             "source": "https://pytorch.org/docs/stable/intro.html", "chunk_type": "text", "score": 0.85},
+        ],
+        "query": args.get("query", "default query"),
+        "count": 2
+    }
+
+
 class TestMCPProtocol:
     """Test class for MCP protocol handler."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def protocol_handler(self):
-        """Create protocol handler fixture."""
+        """Create protocol handler fixture, shared because the handler is stateless."""
         return MCPProtocolHandler(mock_search_handler)
     
     def test_initialize(self, protocol_handler):
         """Test initialize method."""
-        message = {
-            "jsonrpc": "2.0",
-            "id": "test",
-            "method": "initialize"
-        }
-        
-        response = protocol_handler.process_message(json.dumps(message))
+        response = protocol_handler.process_message(_INIT_REQ)
         response_data = json.loads(response)
         
         assert response_data["id"] == "test"
@@ -40,13 +74,7 @@ class TestMCPProtocol:
     
     def test_list_tools(self, protocol_handler):
         """Test list_tools method."""
-        message = {
-            "jsonrpc": "2.0",
-            "id": "test",
-            "method": "list_tools"
-        }
-        
-        response = protocol_handler.process_message(json.dumps(message))
+        response = protocol_handler.process_message(_LIST_REQ)
         response_data = json.loads(response)
         
         assert response_data["id"] == "test"
@@ -61,31 +89,11 @@ class TestMCPProtocol:
     
     def test_call_tool(self, protocol_handler):
         """Test call_tool method."""
-        # Get the tool descriptor to use the correct name
-        list_message = {
-            "jsonrpc": "2.0",
-            "id": "list",
-            "method": "list_tools"
-        }
-        list_response = protocol_handler.process_message(json.dumps(list_message))
-        list_data = json.loads(list_response)
-        tool_name = list_data["result"]["tools"][0]["name"]
-        
-        # Call the tool
-        message = {
-            "jsonrpc": "2.0",
-            "id": "test",
-            "method": "call_tool",
-            "params": {
-                "tool": tool_name,
-                "args": {
-                    "query": "test query"
-                }
-            }
-        }
-        
-        response = protocol_handler.process_message(json.dumps(message))
-        response_data = json.loads(response)
+        # The advertised tool name is the one the call uses
+        list_data = json.loads(protocol_handler.process_message(_LIST_REQ))
+        assert list_data["result"]["tools"][0]["name"] == _CALL_TOOL_MSG["params"]["tool"]
+
+        response_data = protocol_handler.process_dict(_CALL_TOOL_MSG)
         
         assert response_data["id"] == "test"
         assert "result" in response_data
@@ -93,16 +101,21 @@ class TestMCPProtocol:
         assert "results" in response_data["result"]["result"]
         assert response_data["result"]["result"]["query"] == "test query"
     
+    def test_call_tool_full_result_shape(self):
+        """Test that call_tool results keep every field through the JSON round trip."""
+        handler = MCPProtocolHandler(full_search_handler)
+        tool_name = handler.tool_descriptor["name"]
+        message = {"jsonrpc": "2.0", "id": "test-call", "method": "call_tool",
+                   "params": {"tool": tool_name, "args": {"query": "How to use DataLoader"}}}
+        
+        response_data = json.loads(handler.process_message(json.dumps(message)))
+        
+        assert response_data["id"] == "test-call"
+        assert response_data["result"]["result"] == full_search_handler({"query": "How to use DataLoader"})
+    
     def test_invalid_method(self, protocol_handler):
         """Test invalid method."""
-        message = {
-            "jsonrpc": "2.0",
-            "id": "test",
-            "method": "invalid_method"
-        }
-        
-        response = protocol_handler.process_message(json.dumps(message))
-        response_data = json.loads(response)
+        response_data = protocol_handler.process_dict(_INVALID_METHOD_MSG)
         
         assert response_data["id"] == "test"
         assert "error" in response_data
@@ -118,23 +131,51 @@ class TestMCPProtocol:
         assert "error" in response_data
         assert response_data["error"]["code"] == -32700
     
+    @pytest.mark.parametrize("message, code", [
+        ('[1]', -32600),
+        ('"initialize"', -32600),
+        ('{"id": "test", "method": [1]}', -32601),
+        ('{"id": "test", "method": {"name": "initialize"}}', -32601),
+    ])
+    def test_malformed_request(self, protocol_handler, message, code):
+        """Test that well-formed JSON that isn't a valid request gets an error response."""
+        response_data = json.loads(protocol_handler.process_message(message))
+        
+        assert response_data["error"]["code"] == code
+    
+    def test_clear_cache_requires_invalidator(self, protocol_handler):
+        """Test that clear_cache is only offered when the server supplies an invalidator."""
+        cleared = []
+        handler = MCPProtocolHandler(mock_search_handler, clear_cache=lambda: cleared.append(True))
+        
+        assert protocol_handler.process_dict({"id": 1, "method": "clear_cache"})["error"]["code"] == -32601
+        assert handler.process_dict({"id": 1, "method": "clear_cache"})["result"] == {"cleared": True}
+        assert cleared == [True]
+    
     def test_unknown_tool(self, protocol_handler):
         """Test unknown tool."""
-        message = {
-            "jsonrpc": "2.0",
-            "id": "test",
-            "method": "call_tool",
-            "params": {
-                "tool": "unknown_tool",
-                "args": {
-                    "query": "test query"
-                }
-            }
-        }
-        
-        response = protocol_handler.process_message(json.dumps(message))
-        response_data = json.loads(response)
+        response_data = protocol_handler.process_dict(_UNKNOWN_TOOL_MSG)
         
         assert response_data["id"] == "test"
         assert "error" in response_data
-        assert response_data["error"]["code"] == -32602
\ No newline at end of file
+        assert response_data["error"]["code"] == -32602
+    
+    def test_stdlib_json_fallback(self, protocol_handler, monkeypatch):
+        """Test that bytes messages and parse errors behave the same without orjson."""
+        monkeypatch.setattr(handler_module, "orjson", None)
+        
+        response_data = json.loads(protocol_handler.process_message(b'{"id": "b", "method": "initialize"}'))
+        error_data = json.loads(protocol_handler.process_message(b"invalid json"))
+        
+        assert response_data["id"] == "b"
+        assert error_data["error"]["code"] == -32700
+    
+    def test_static_responses_patch_id(self, protocol_handler):
+        """Test that cached initialize and list_tools replies carry each request's id."""
+        for method in ("initialize", "list_tools"):
+            first = json.loads(protocol_handler.process_message(json.dumps({"id": 1, "method": method})))
+            second = json.loads(protocol_handler.process_message(json.dumps({"id": "two", "method": method})))
+            
+            assert (first["id"], second["id"]) == (1, "two")
+            assert first["jsonrpc"] == "2.0"
+            assert first["result"] == second["result"]
@@ -0,0 +1,144 @@
+"""
+Unit tests for the search engine.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from ptsearch.core import search as search_module
+from ptsearch.core.embedding import _ZERO_EMBEDDING
+from ptsearch.core.search import SearchEngine
+
+
+class CountingEmbedder:
+    """Embedder stand-in that records the texts it is asked to embed."""
+
+    def __init__(self, result=None):
+        self.calls = []
+        self.result = result
+
+    def generate_embedding(self, text):
+        self.calls.append(text)
+        return self.result if self.result is not None else [float(len(self.calls))] * 4
+
+
+class TestQueryEmbeddingCache:
+    """Test class for the in-process query embedding cache."""
+
+    def make_engine(self, embedder, **kwargs):
+        """Create a search engine whose database is never touched."""
+        return SearchEngine(database_manager=object(), embedding_generator=embedder, **kwargs)
+
+    def test_repeated_query_skips_embedder(self):
+        """Test that the same query, modulo whitespace, is embedded once."""
+        embedder = CountingEmbedder()
+        engine = self.make_engine(embedder)
+
+        first = engine._process_query("how to use  DataLoader")
+        second = engine._process_query("  how to use DataLoader ")
+
+        assert embedder.calls == ["how to use DataLoader"]
+        assert second["embedding"] is first["embedding"]
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that the cache holds at most query_cache_size entries."""
+        embedder = CountingEmbedder()
+        engine = self.make_engine(embedder, query_cache_size=2)
+
+        for query in ("a", "b", "a", "c", "a", "b"):
+            engine._process_query(query)
+
+        assert embedder.calls == ["a", "b", "c", "b"]
+
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        """Test that stale entries are embedded again."""
+        clock = [100.0]
+        monkeypatch.setattr(search_module.time, "monotonic", lambda: clock[0])
+        embedder = CountingEmbedder()
+        engine = self.make_engine(embedder, query_cache_ttl=60)
+
+        engine._process_query("tensor")
+        clock[0] += 30
+        engine._process_query("tensor")
+        clock[0] += 60
+        engine._process_query("tensor")
+
+        assert embedder.calls == ["tensor", "tensor"]
+
+    @pytest.mark.parametrize("cache_size, embedder", [
+        (0, CountingEmbedder()),
+        (16, CountingEmbedder(result=_ZERO_EMBEDDING)),
+    ])
+    def test_uncached_queries(self, cache_size, embedder):
+        """Test that a disabled cache or a failed embedding always calls the embedder."""
+        engine = self.make_engine(embedder, query_cache_size=cache_size)
+
+        engine._process_query("tensor")
+        engine._process_query("tensor")
+
+        assert len(embedder.calls) == 2
+
+
+class EmptyDatabase:
+    """Database stand-in that never matches anything."""
+
+    def query(self, query_embedding, n_results=5, filters=None):
+        return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+
+class TestSearchMetadata:
+    """Test class for search result metadata."""
+
+    @pytest.mark.parametrize("result, expected", [(None, False), (_ZERO_EMBEDDING, True)])
+    def test_embedding_fallback_is_flagged(self, result, expected):
+        """Test that searches run against the zero fallback vector say so."""
+        engine = SearchEngine(EmptyDatabase(), CountingEmbedder(result=result))
+
+        assert engine.search("tensor")["metadata"]["embedding_fallback"] is expected
+
+
+class TestAsyncSearch:
+    """Test class for concurrent searches."""
+
+    def test_asearch_overlaps_embedding_calls(self):
+        """Test that concurrent asearch calls are inside the embedder at the same time."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        class BarrierEmbedder:
+            def generate_embedding(self, text):
+                barrier.wait()
+                return [0.1] * 4
+
+        engine = SearchEngine(EmptyDatabase(), BarrierEmbedder())
+
+        async def run():
+            return await asyncio.gather(engine.asearch("first"), engine.asearch("second"))
+
+        results = asyncio.run(run())
+
+        assert [r["query"] for r in results] == ["first", "second"]
+
+
+class TestCodeQueryDetection:
+    """Test class for code-intent detection."""
+
+    QUERIES = [
+        ("Show me an EXAMPLE of autograd", True),
+        ("what does torch.nn.Linear do", True),
+        ("x += 1 fails", True),
+        ("Def foo", False),
+        ("explain gradient clipping", False),
+    ]
+
+    @pytest.mark.parametrize("use_automaton", [True, False])
+    @pytest.mark.parametrize("query, expected", QUERIES)
+    def test_is_code_query(self, monkeypatch, use_automaton, query, expected):
+        """Test that the automaton and regex matchers agree, including case sensitivity."""
+        if use_automaton and search_module.ahocorasick is None:
+            pytest.skip("pyahocorasick not installed")
+        if not use_automaton:
+            monkeypatch.setattr(search_module, "_INDICATOR_AUTOMATON", None)
+
+        assert SearchEngine._is_code_query(None, query) is expected
@@ -0,0 +1,65 @@
+"""
+End-to-end tests for the search flow with the database and embedder mocked out.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from ptsearch.core.search import SearchEngine
+
+# One shared, read-only embedding instead of a new list per call
+MOCK_EMBEDDING = np.full((10,), 0.1, dtype=np.float32)
+MOCK_EMBEDDING.setflags(write=False)
+
+
+class MockDatabaseManager:
+    """Database stand-in returning parallel arrays, one row per query embedding."""
+
+    def query(self, query_embedding, n_results=5, filters=None):
+        return {
+            "ids": np.array([["doc1", "doc2"]], dtype=object),
+            "documents": np.array([["This is a PyTorch DataLoader example.", "Another PyTorch sample."]],
+                                  dtype=object),
+            "metadatas": np.array([[
+                {"title": "DataLoader Example", "chunk_type": "code",
+                 "source": "https://pytorch.org/docs/stable/data.html"},
+                {"title": "PyTorch Basics", "chunk_type": "text",
+                 "source": "https://pytorch.org/docs/stable/intro.html"},
+            ]], dtype=object),
+            "distances": np.array([[0.1, 0.2]], dtype=np.float32),
+        }
+
+
+class MockEmbeddingGenerator:
+    """Embedder stand-in returning one shared read-only vector."""
+
+    def generate_embedding(self, text):
+        return MOCK_EMBEDDING
+
+
+class TestSearchFlow:
+    """Test class for SearchEngine with mocked components."""
+
+    @pytest.fixture
+    def engine(self):
+        """Create a search engine over the mocks."""
+        return SearchEngine(MockDatabaseManager(), MockEmbeddingGenerator())
+
+    def test_search_ranks_and_serializes(self, engine):
+        """Test that a concept query ranks text first and the response is plain JSON."""
+        results = engine.search("How to use DataLoader in PyTorch")
+
+        assert results["query"] == "How to use DataLoader in PyTorch"
+        assert results["count"] == 2
+        assert [r["title"] for r in results["results"]] == ["PyTorch Basics", "DataLoader Example"]
+        assert results["metadata"]["is_code_query"] is False
+        assert json.loads(json.dumps(results)) == results
+
+    def test_code_query_boosts_code_chunks(self, engine):
+        """Test that a code query puts the code chunk first."""
+        results = engine.search("Show me example code for a DataLoader")
+
+        assert results["results"][0]["chunk_type"] == "code"
+        assert results["results"][0]["match_reason"] == "code query & code content"
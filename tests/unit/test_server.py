@@ -0,0 +1,121 @@
+"""
+Unit tests for the MCP server search handler.
+"""
+
+import functools
+from types import SimpleNamespace
+
+import pytest
+
+import mcp_server_pytorch.__main__ as server
+from ptsearch.protocol import MCPProtocolHandler
+
+
+class FakeSearchEngine:
+    """Search engine stub that records its calls."""
+
+    def __init__(self, embedding_fallback=False):
+        self.calls = []
+        self.embedding_fallback = embedding_fallback
+
+    def search(self, query, num_results, filter_type=None):
+        self.calls.append((query, num_results, filter_type))
+        return {"results": [{"title": query}], "query": query,
+                "metadata": {"embedding_fallback": self.embedding_fallback}}
+
+
+@pytest.fixture
+def state():
+    """Create server state around a fake search engine."""
+    return server.ServerState(db=None, embedder=None, engine=FakeSearchEngine())
+
+
+class TestSearchHandler:
+    """Test class for the MCP search handler."""
+
+    def test_repeated_queries_are_cached(self, state):
+        """Test that identical queries only search once."""
+        first = server.search_handler(state, {"query": "tensor  reshape", "num_results": 3})
+        second = server.search_handler(state, {"query": " tensor reshape ", "num_results": 3})
+
+        assert first == second
+        assert state.engine.calls == [("tensor reshape", 3, None)]
+
+    def test_cached_results_are_copies(self, state):
+        """Test that mutating a returned result doesn't change the cache."""
+        server.search_handler(state, {"query": "autograd", "filter": "code"})["results"].clear()
+
+        assert server.search_handler(state, {"query": "autograd", "filter": "code"})["results"]
+        assert len(state.engine.calls) == 1
+
+    def test_clear_cache(self, state):
+        """Test that clearing the cache forces a new search."""
+        server.search_handler(state, {"query": "autograd"})
+        state.clear_cache()
+        server.search_handler(state, {"query": "autograd"})
+
+        assert len(state.engine.calls) == 2
+
+    @pytest.mark.parametrize("cache_size, embedding_fallback", [(0, False), (16, True)])
+    def test_uncached_searches(self, cache_size, embedding_fallback):
+        """Test that a disabled cache or a zero-vector fallback result always searches again."""
+        state = server.ServerState(db=None, embedder=None, engine=FakeSearchEngine(embedding_fallback),
+                                   cache_size=cache_size)
+
+        server.search_handler(state, {"query": "autograd"})
+        server.search_handler(state, {"query": "autograd"})
+
+        assert len(state.engine.calls) == 2
+
+    def test_results_expire_after_ttl(self, monkeypatch):
+        """Test that stale results are searched again."""
+        clock = [100.0]
+        monkeypatch.setattr(server.time, "monotonic", lambda: clock[0])
+        state = server.ServerState(db=None, embedder=None, engine=FakeSearchEngine(), cache_ttl=60)
+
+        server.search_handler(state, {"query": "autograd"})
+        clock[0] += 30
+        server.search_handler(state, {"query": "autograd"})
+        clock[0] += 60
+        server.search_handler(state, {"query": "autograd"})
+
+        assert len(state.engine.calls) == 2
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that the result cache holds at most cache_size entries."""
+        state = server.ServerState(db=None, embedder=None, engine=FakeSearchEngine(), cache_size=2)
+
+        for query in ("a", "b", "a", "c", "a", "b"):
+            server.search_handler(state, {"query": query})
+
+        assert [call[0] for call in state.engine.calls] == ["a", "b", "c", "b"]
+
+    def test_clear_cache_protocol_method(self, state):
+        """Test that the clear_cache MCP method invalidates cached results."""
+        handler = MCPProtocolHandler(functools.partial(server.search_handler, state),
+                                     clear_cache=state.clear_cache)
+        call = {"method": "call_tool", "params": {"tool": handler.tool_name, "args": {"query": "autograd"}}}
+
+        handler.process_dict(call)
+        assert handler.process_dict({"id": 1, "method": "clear_cache"})["result"] == {"cleared": True}
+        handler.process_dict(call)
+
+        assert len(state.engine.calls) == 2
+
+    def test_reload_clears_cache(self, state):
+        """Test that reloading the store through the state drops cached results."""
+        loaded = []
+        state.db = SimpleNamespace(load_from_file=lambda path, **kwargs: loaded.append(path))
+
+        server.search_handler(state, {"query": "autograd"})
+        state.load_from_file("chunks.json")
+        server.search_handler(state, {"query": "autograd"})
+
+        assert loaded == ["chunks.json"]
+        assert len(state.engine.calls) == 2
+
+    def test_empty_arguments_use_defaults(self, state):
+        """Test that empty filter and result count fall back to defaults."""
+        server.search_handler(state, {"query": "autograd", "filter": "", "num_results": ""})
+
+        assert state.engine.calls == [("autograd", server.settings.max_results, None)]
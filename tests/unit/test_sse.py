@@ -0,0 +1,54 @@
+"""
+Unit tests for the SSE transport.
+"""
+
+import gzip
+import json
+
+import pytest
+
+from ptsearch.protocol import MCPProtocolHandler
+from ptsearch.transport.sse import SSETransport
+from ptsearch.utils.error import TransportError
+
+
+def mock_search_handler(args):
+    """Mock search handler returning a payload large enough to compress."""
+    return {"results": [{"title": f"Result {i}", "snippet": "torch.nn.Module " * 20} for i in range(5)],
+            "query": args.get("query", "")}
+
+
+class TestSSETransport:
+    """Test class for SSE transport."""
+
+    @pytest.fixture
+    def client(self):
+        """Create a Flask test client for a gzip-enabled transport."""
+        transport = SSETransport(MCPProtocolHandler(mock_search_handler), compression="gzip")
+        return transport.flask_app.test_client()
+
+    def test_search_is_gzipped_when_accepted(self, client):
+        """Test that JSON responses are compressed for gzip-capable clients."""
+        response = client.post("/search", json={"query": "module"}, headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(response.data))["query"] == "module"
+
+    def test_search_is_plain_without_accept_encoding(self, client):
+        """Test that clients not accepting gzip get uncompressed JSON."""
+        response = client.post("/search", json={"query": "module"})
+
+        assert "Content-Encoding" not in response.headers
+        assert response.get_json()["query"] == "module"
+
+    def test_tools_list_includes_endpoint(self, client):
+        """Test that the cached tool list carries the SSE call endpoint."""
+        tools = client.get("/tools/list").get_json()
+
+        assert tools[0]["name"] == MCPProtocolHandler(mock_search_handler).tool_name
+        assert tools[0]["endpoint"] == {"path": "/tools/call", "method": "POST"}
+
+    def test_unknown_compression_is_rejected(self):
+        """Test that unsupported compression settings fail fast."""
+        with pytest.raises(TransportError):
+            SSETransport(MCPProtocolHandler(mock_search_handler), compression="br")
@@ -0,0 +1,88 @@
+"""
+In-process tests for the STDIO transport, covering the same exchange as test_mcp_protocol.py.
+"""
+
+import functools
+import io
+import json
+
+import numpy as np
+import pytest
+
+import mcp_server_pytorch.__main__ as server
+from ptsearch.core.search import SearchEngine
+from ptsearch.protocol import MCPProtocolHandler
+from ptsearch.transport import stdio as stdio_module
+from ptsearch.transport.stdio import STDIOTransport
+
+
+class MockDatabaseManager:
+    """Database stand-in returning one code and one text chunk."""
+
+    def query(self, query_embedding, n_results=5, filters=None):
+        return {
+            "ids": [["doc1", "doc2"]],
+            "documents": [["DataLoader example code.", "DataLoader overview."]],
+            "metadatas": [[
+                {"title": "DataLoader", "chunk_type": "code", "source": "data.html"},
+                {"title": "Basics", "chunk_type": "text", "source": "intro.html"},
+            ]],
+            "distances": [[0.1, 0.2]],
+        }
+
+
+MOCK_EMBEDDING = np.full((4,), 0.1, dtype=np.float32)
+MOCK_EMBEDDING.setflags(write=False)
+
+
+class MockEmbeddingGenerator:
+    """Embedder stand-in returning one shared read-only vector."""
+
+    def generate_embedding(self, text):
+        return MOCK_EMBEDDING
+
+
+@pytest.fixture
+def run_session(monkeypatch):
+    """Return a function that feeds messages through a transport and parses its replies."""
+    monkeypatch.setattr(stdio_module.signal, "signal", lambda *args: None)
+    engine = SearchEngine(MockDatabaseManager(), MockEmbeddingGenerator())
+    state = server.ServerState(db=None, embedder=None, engine=engine)
+    transport = STDIOTransport(MCPProtocolHandler(functools.partial(server.search_handler, state)))
+
+    def run(messages):
+        lines = "".join((m if isinstance(m, str) else json.dumps(m)) + "\n" for m in messages)
+        stdout = io.StringIO()
+        monkeypatch.setattr(stdio_module.sys, "stdin", io.TextIOWrapper(io.BytesIO(lines.encode("utf-8"))))
+        monkeypatch.setattr(stdio_module.sys, "stdout", stdout)
+        transport.start()
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    return run
+
+
+class TestSTDIOTransport:
+    """Test class for the STDIO transport."""
+
+    def test_protocol_exchange(self, run_session):
+        """Test initialize, list_tools and call_tool replies in order."""
+        tool_name = server.settings.tool_name
+        replies = run_session([
+            {"jsonrpc": "2.0", "id": "1", "method": "initialize"},
+            {"jsonrpc": "2.0", "id": "2", "method": "list_tools"},
+            {"jsonrpc": "2.0", "id": "3", "method": "call_tool",
+             "params": {"tool": tool_name, "args": {"query": "How to use PyTorch DataLoader", "num_results": 1}}},
+        ])
+
+        assert [reply["id"] for reply in replies] == ["1", "2", "3"]
+        assert "capabilities" in replies[0]["result"]
+        assert replies[1]["result"]["tools"][0]["name"] == tool_name
+        results = replies[2]["result"]["result"]["results"]
+        assert len(results) == 1 and results[0]["title"] == "DataLoader"
+
+    def test_invalid_json_gets_parse_error(self, run_session):
+        """Test that a malformed line yields a JSON-RPC parse error and the loop continues."""
+        replies = run_session(["{bad", {"jsonrpc": "2.0", "id": "1", "method": "initialize"}])
+
+        assert replies[0]["error"]["code"] == -32700
+        assert replies[1]["id"] == "1"